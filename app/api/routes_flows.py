@@ -1,9 +1,13 @@
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import exists, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
 
+from app.api.serialization import row_to_dict, rows_response, stream_rows_response
 from app.core.database import get_db
 from app.models.scrape import ScrapeLog, ScrapeRun, ScrapedFile
 from app.services.prefect_client import prefect_client
@@ -16,12 +20,15 @@ from app.schemas.scrape import (
 
 router = APIRouter(tags=["flows"])
 
+# Upper bound for a single page of run logs/files
+MAX_PAGE_SIZE = 5000
+
 
 @router.post("/flows/trigger/{flow_name}")
 def trigger_flow(flow_name: str, source_id: str):
     """Trigger a Prefect flow by name with the given source_id parameter."""
     result = prefect_client.trigger_flow(flow_name, source_id)
-    return {"message": f"Flow {flow_name} triggered", "result": result}
+    return ORJSONResponse({"message": f"Flow {flow_name} triggered", "result": result})
 
 
 @router.post("/trigger/{flow_name}", include_in_schema=False)
@@ -30,58 +37,75 @@ def trigger_flow_legacy(flow_name: str, source_id: str):
 
 
 @router.get("/flows/sources/{source_id}/runs", response_model=List[ScrapeRunSummary])
-def list_runs_for_source(source_id: UUID, db: Session = Depends(get_db)):
+async def list_runs_for_source(source_id: UUID, db: AsyncSession = Depends(get_db)):
     runs = (
-        db.query(ScrapeRun)
-        .filter(ScrapeRun.source_id == source_id)
-        .order_by(ScrapeRun.started_at.desc())
-        .limit(100)
-        .all()
-    )
-    return runs
+        await db.scalars(
+            select(ScrapeRun)
+            .where(ScrapeRun.source_id == source_id)
+            .order_by(ScrapeRun.started_at.desc())
+            .limit(100)
+        )
+    ).all()
+    return rows_response(runs, ScrapeRunSummary)
 
 
 @router.get("/flows/runs/{run_id}", response_model=ScrapeRunDetail)
-def get_run_detail(run_id: UUID, db: Session = Depends(get_db)):
-    run = db.query(ScrapeRun).filter(ScrapeRun.id == run_id).first()
+async def get_run_detail(run_id: UUID, db: AsyncSession = Depends(get_db)):
+    run = await db.get(
+        ScrapeRun,
+        run_id,
+        options=[
+            selectinload(ScrapeRun.logs),
+            selectinload(ScrapeRun.files),
+            raiseload("*"),
+        ],
+    )
     if not run:
         raise HTTPException(status_code=404, detail="Scrape run not found")
 
-    logs = sorted(run.logs, key=lambda entry: entry.timestamp)
-    files = sorted(run.files, key=lambda item: item.processed_at)
-
-    return ScrapeRunDetail(
-        id=run.id,
-        source_id=run.source_id,
-        flow_run_id=run.flow_run_id,
-        status=run.status,
-        started_at=run.started_at,
-        finished_at=run.finished_at,
-        total_files_found=run.total_files_found,
-        total_files_processed=run.total_files_processed,
-        notes=run.notes,
-        logs=logs,
-        files=files,
-    )
+    content = row_to_dict(run, ScrapeRunDetail)
+    content["logs"] = [row_to_dict(entry, ScrapeLogEntry) for entry in run.logs]
+    content["files"] = [row_to_dict(item, ScrapedFileResponse) for item in run.files]
+    return ORJSONResponse(content=content)
+
+
+async def _ensure_run_exists(db: AsyncSession, run_id: UUID):
+    """404 like get_run_detail, instead of an empty page for an unknown run"""
+    if not await db.scalar(select(exists().where(ScrapeRun.id == run_id))):
+        raise HTTPException(status_code=404, detail="Scrape run not found")
 
 
 @router.get("/flows/runs/{run_id}/logs", response_model=List[ScrapeLogEntry])
-def get_run_logs(run_id: UUID, db: Session = Depends(get_db)):
-    logs = (
-        db.query(ScrapeLog)
-        .filter(ScrapeLog.run_id == run_id)
-        .order_by(ScrapeLog.timestamp.asc())
-        .all()
+async def get_run_logs(
+    run_id: UUID,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    await _ensure_run_exists(db, run_id)
+    return stream_rows_response(
+        select(ScrapeLog)
+        .where(ScrapeLog.run_id == run_id)
+        .order_by(ScrapeLog.timestamp.asc(), ScrapeLog.id.asc())
+        .offset(offset)
+        .limit(limit),
+        ScrapeLogEntry,
     )
-    return logs
 
 
 @router.get("/flows/runs/{run_id}/files", response_model=List[ScrapedFileResponse])
-def get_run_files(run_id: UUID, db: Session = Depends(get_db)):
-    files = (
-        db.query(ScrapedFile)
-        .filter(ScrapedFile.run_id == run_id)
-        .order_by(ScrapedFile.processed_at.asc())
-        .all()
+async def get_run_files(
+    run_id: UUID,
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    await _ensure_run_exists(db, run_id)
+    return stream_rows_response(
+        select(ScrapedFile)
+        .where(ScrapedFile.run_id == run_id)
+        .order_by(ScrapedFile.processed_at.asc(), ScrapedFile.id.asc())
+        .offset(offset)
+        .limit(limit),
+        ScrapedFileResponse,
     )
-    return files
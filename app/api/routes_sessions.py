@@ -3,13 +3,19 @@ API Routes for Telegram Session Management with Interactive OTP Flow
 """
 
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import msgspec
+from uuid import UUID
 from datetime import datetime, timedelta, timezone
 import uuid
 
+from app.api.serialization import paged_rows_response
 from app.core.database import get_db
-from app.models.session import TelegramSession
+from app.models.session import ActiveStatus, TelegramSession
+from app.models.source import Source
 from app.models.temp_session import TempSession
 from app.schemas.session import (
     OTPSendRequest,
@@ -21,15 +27,24 @@ from app.schemas.session import (
     ChannelInfo,
     SessionUpdate,
 )
-from app.services.encryption import encrypt_data, decrypt_data
+from app.services.api_credentials import get_or_create_api_credential
+from app.services.encryption import (
+    decrypt_data,
+    decrypt_session_credentials,
+    encrypt_data,
+)
 from app.services.telegram_client import TelegramClientService
 
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+# Encodes ChannelInfoStruct lists; response_model=List[ChannelInfo] only
+# documents the shape
+_channels_encoder = msgspec.json.Encoder()
+
 
 @router.post("/send-otp", response_model=OTPSendResponse)
-async def send_otp(request: OTPSendRequest, db: Session = Depends(get_db)):
+async def send_otp(request: OTPSendRequest, db: AsyncSession = Depends(get_db)):
     """
     Step 1: Send OTP to phone number
 
@@ -41,10 +56,8 @@ async def send_otp(request: OTPSendRequest, db: Session = Depends(get_db)):
     5. Frontend calls /verify-otp with code
     """
     # Check if phone number already has an active session
-    existing = (
-        db.query(TelegramSession)
-        .filter(TelegramSession.phone_number == request.phone_number)
-        .first()
+    existing = await db.scalar(
+        select(exists().where(TelegramSession.phone_number == request.phone_number))
     )
 
     if existing:
@@ -53,6 +66,9 @@ async def send_otp(request: OTPSendRequest, db: Session = Depends(get_db)):
             detail=f"Session already exists for {request.phone_number}. Delete it first or use existing session.",
         )
 
+    # Return the connection to the pool before awaiting Telegram
+    await db.commit()
+
     try:
         # Send OTP via Telethon
         session_string, phone_code_hash = await TelegramClientService.send_otp(
@@ -63,18 +79,16 @@ async def send_otp(request: OTPSendRequest, db: Session = Depends(get_db)):
 
         # Create temporary session
         temp_session = TempSession(
-            id=str(uuid.uuid4()),
+            id=uuid.uuid4(),
             phone_number=request.phone_number,
             api_id=request.api_id,
             api_hash=encrypt_data(request.api_hash),
             session_string=encrypt_data(session_string),
             phone_code_hash=encrypt_data(phone_code_hash),
-            expires_at=datetime.now(timezone.utc) + timedelta(minutes=10),
         )
 
         db.add(temp_session)
-        db.commit()
-        db.refresh(temp_session)
+        await db.commit()
 
         return OTPSendResponse(
             temp_session_id=temp_session.id,
@@ -88,7 +102,7 @@ async def send_otp(request: OTPSendRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/verify-otp", response_model=SessionResponse)
-async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
+async def verify_otp(request: OTPVerifyRequest, db: AsyncSession = Depends(get_db)):
     """
     Step 2: Verify OTP and create permanent session
 
@@ -99,19 +113,15 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
     4. Returns session details
     """
     # Get temporary session
-    temp_session = (
-        db.query(TempSession).filter(TempSession.id == request.temp_session_id).first()
-    )
+    temp_session = await db.get(TempSession, request.temp_session_id)
 
     if not temp_session:
         raise HTTPException(
             status_code=404, detail="Temporary session not found or expired"
         )
 
-    # Check if expired
+    # Check if expired (expired rows are purged by the background cleanup job)
     if temp_session.is_expired:
-        db.delete(temp_session)
-        db.commit()
         raise HTTPException(
             status_code=400, detail="Temporary session expired. Request a new OTP."
         )
@@ -121,6 +131,9 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
     session_string = decrypt_data(temp_session.session_string)
     phone_code_hash = decrypt_data(temp_session.phone_code_hash)
 
+    # Return the connection to the pool before awaiting Telegram
+    await db.commit()
+
     try:
         # Verify OTP with Telegram
         final_session_string = await TelegramClientService.verify_otp(
@@ -136,23 +149,24 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
         # Create permanent session
         session_name = request.session_name or f"Session {temp_session.phone_number}"
 
+        # Telegram just accepted api_hash, so it may replace a stored one
         permanent_session = TelegramSession(
-            id=str(uuid.uuid4()),
+            id=uuid.uuid4(),
             name=session_name,
             phone_number=temp_session.phone_number,
-            api_id=temp_session.api_id,
-            api_hash=encrypt_data(api_hash),
+            api_credential=await get_or_create_api_credential(
+                db, temp_session.api_id, api_hash, verified=True
+            ),
             session_string=encrypt_data(final_session_string),
-            is_active="active",
+            is_active=ActiveStatus.ACTIVE,
         )
 
         db.add(permanent_session)
 
         # Delete temporary session
-        db.delete(temp_session)
+        await db.delete(temp_session)
 
-        db.commit()
-        db.refresh(permanent_session)
+        await db.commit()
 
         return permanent_session
 
@@ -165,7 +179,7 @@ async def upload_session_file(
     api_id: int = Form(...),
     api_hash: str = Form(...),
     session_file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Alternative: Upload existing .session file
@@ -192,10 +206,8 @@ async def upload_session_file(
         )
 
         # Check if phone already exists
-        existing = (
-            db.query(TelegramSession)
-            .filter(TelegramSession.phone_number == phone_number)
-            .first()
+        existing = await db.scalar(
+            select(exists().where(TelegramSession.phone_number == phone_number))
         )
 
         if existing:
@@ -205,7 +217,7 @@ async def upload_session_file(
 
         # Create temporary session for finalization
         temp_session = TempSession(
-            id=str(uuid.uuid4()),
+            id=uuid.uuid4(),
             phone_number=phone_number,
             api_id=api_id,
             api_hash=encrypt_data(api_hash),
@@ -215,8 +227,7 @@ async def upload_session_file(
         )
 
         db.add(temp_session)
-        db.commit()
-        db.refresh(temp_session)
+        await db.commit()
 
         return SessionFileUploadResponse(
             temp_session_id=temp_session.id,
@@ -232,7 +243,7 @@ async def upload_session_file(
 
 @router.post("/finalize", response_model=SessionResponse)
 async def finalize_session(
-    request: SessionFinalizeRequest, db: Session = Depends(get_db)
+    request: SessionFinalizeRequest, db: AsyncSession = Depends(get_db)
 ):
     """
     Step 3: Finalize session creation with a name
@@ -240,52 +251,65 @@ async def finalize_session(
     Used after uploading a session file to provide a friendly name
     """
     # Get temporary session
-    temp_session = (
-        db.query(TempSession).filter(TempSession.id == request.temp_session_id).first()
-    )
+    temp_session = await db.get(TempSession, request.temp_session_id)
 
     if not temp_session:
         raise HTTPException(status_code=404, detail="Temporary session not found")
 
+    # Expired rows are purged by the background cleanup job
     if temp_session.is_expired:
-        db.delete(temp_session)
-        db.commit()
         raise HTTPException(status_code=400, detail="Temporary session expired")
 
     # Decrypt data
     api_hash = decrypt_data(temp_session.api_hash)
     session_string = decrypt_data(temp_session.session_string)
 
-    # Create permanent session
+    # Create permanent session; the uploaded session was authorized against
+    # Telegram with api_hash, so it may replace a stored one
     permanent_session = TelegramSession(
-        id=str(uuid.uuid4()),
+        id=uuid.uuid4(),
         name=request.name,
         phone_number=temp_session.phone_number,
-        api_id=temp_session.api_id,
-        api_hash=encrypt_data(api_hash),
+        api_credential=await get_or_create_api_credential(
+            db, temp_session.api_id, api_hash, verified=True
+        ),
         session_string=encrypt_data(session_string),
-        is_active="active",
+        is_active=ActiveStatus.ACTIVE,
     )
 
     db.add(permanent_session)
-    db.delete(temp_session)
-    db.commit()
-    db.refresh(permanent_session)
+    await db.delete(temp_session)
+    await db.commit()
 
     return permanent_session
 
 
 @router.get("/", response_model=List[SessionResponse])
-def get_all_sessions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all stored Telegram sessions"""
-    sessions = db.query(TelegramSession).offset(skip).limit(limit).all()
-    return sessions
+async def get_all_sessions(
+    after_id: Optional[UUID] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get all stored Telegram sessions
+
+    Pass the X-Next-Cursor header of the previous page as after_id to page
+    by key; skip is kept for existing clients.
+    """
+    stmt = select(TelegramSession).order_by(TelegramSession.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(TelegramSession.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+    sessions = (await db.scalars(stmt)).all()
+    return paged_rows_response(sessions, SessionResponse, limit)
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
-def get_session(session_id: str, db: Session = Depends(get_db)):
+async def get_session(session_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get details of a specific session"""
-    session = db.query(TelegramSession).filter(TelegramSession.id == session_id).first()
+    session = await db.get(TelegramSession, session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -294,28 +318,35 @@ def get_session(session_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{session_id}/channels", response_model=List[ChannelInfo])
-async def get_session_channels(session_id: str, db: Session = Depends(get_db)):
+async def get_session_channels(session_id: UUID, db: AsyncSession = Depends(get_db)):
     """
     Get all channels/groups accessible by this session
     """
-    session = db.query(TelegramSession).filter(TelegramSession.id == session_id).first()
+    session = await db.get(TelegramSession, session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if session.is_active != "active":
+    if session.is_active != ActiveStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Session is not active")
 
     # Decrypt credentials
-    api_hash = decrypt_data(session.api_hash)
-    session_string = decrypt_data(session.session_string)
+    api_hash, session_string = decrypt_session_credentials(session)
+
+    # Return the connection to the pool before awaiting Telegram
+    await db.commit()
 
     # Fetch channels using TelegramClientService
     try:
         channels = await TelegramClientService.get_user_channels(
-            api_id=session.api_id, api_hash=api_hash, session_string=session_string
+            api_id=session.api_id,
+            api_hash=api_hash,
+            session_string=session_string,
+            session_id=str(session.id),
+        )
+        return Response(
+            content=_channels_encoder.encode(channels), media_type="application/json"
         )
-        return channels
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch channels: {str(e)}"
@@ -323,27 +354,32 @@ async def get_session_channels(session_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/{session_id}/test")
-async def test_session(session_id: str, db: Session = Depends(get_db)):
+async def test_session(session_id: UUID, db: AsyncSession = Depends(get_db)):
     """Test if a session is still valid and authorized"""
-    session = db.query(TelegramSession).filter(TelegramSession.id == session_id).first()
+    session = await db.get(TelegramSession, session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Decrypt credentials
-    api_hash = decrypt_data(session.api_hash)
-    session_string = decrypt_data(session.session_string)
+    api_hash, session_string = decrypt_session_credentials(session)
+
+    # Return the connection to the pool before awaiting Telegram
+    await db.commit()
 
     # Test session
     try:
         is_valid = await TelegramClientService.test_session(
-            api_id=session.api_id, api_hash=api_hash, session_string=session_string
+            api_id=session.api_id,
+            api_hash=api_hash,
+            session_string=session_string,
+            session_id=str(session.id),
         )
 
         # Update session status
         if not is_valid:
-            session.is_active = "expired"
-            db.commit()
+            session.is_active = ActiveStatus.EXPIRED
+            await db.commit()
 
         return {
             "session_id": session_id,
@@ -355,11 +391,11 @@ async def test_session(session_id: str, db: Session = Depends(get_db)):
 
 
 @router.put("/{session_id}", response_model=SessionResponse)
-def update_session(
-    session_id: str, session_update: SessionUpdate, db: Session = Depends(get_db)
+async def update_session(
+    session_id: UUID, session_update: SessionUpdate, db: AsyncSession = Depends(get_db)
 ):
     """Update session details (name, active status)"""
-    session = db.query(TelegramSession).filter(TelegramSession.id == session_id).first()
+    session = await db.get(TelegramSession, session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -370,44 +406,48 @@ def update_session(
     if session_update.is_active is not None:
         session.is_active = session_update.is_active
 
-    db.commit()
-    db.refresh(session)
+    await db.commit()
 
     return session
 
 
 @router.delete("/{session_id}")
-def delete_session(session_id: str, db: Session = Depends(get_db)):
+async def delete_session(session_id: UUID, db: AsyncSession = Depends(get_db)):
     """Delete a session"""
-    session = db.query(TelegramSession).filter(TelegramSession.id == session_id).first()
+    session = await db.get(TelegramSession, session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Check if any sources are using this session
-    if session.sources:
+    source_count = await db.scalar(
+        select(func.count()).select_from(Source).where(Source.session_ref == session_id)
+    )
+    if source_count:
         raise HTTPException(
             status_code=400,
-            detail=f"Cannot delete session. It is being used by {len(session.sources)} source(s)",
+            detail=f"Cannot delete session. It is being used by {source_count} source(s)",
         )
 
-    db.delete(session)
-    db.commit()
+    await db.delete(session)
+    await db.commit()
 
-    return {"message": "Session deleted successfully", "id": session_id}
+    return ORJSONResponse({"message": "Session deleted successfully", "id": session_id})
 
 
 @router.delete("/temp/{temp_session_id}")
-def cancel_temp_session(temp_session_id: str, db: Session = Depends(get_db)):
+async def cancel_temp_session(
+    temp_session_id: UUID, db: AsyncSession = Depends(get_db)
+):
     """Cancel a temporary session (useful if user abandons OTP flow)"""
-    temp_session = (
-        db.query(TempSession).filter(TempSession.id == temp_session_id).first()
-    )
+    temp_session = await db.get(TempSession, temp_session_id)
 
     if not temp_session:
         raise HTTPException(status_code=404, detail="Temporary session not found")
 
-    db.delete(temp_session)
-    db.commit()
+    await db.delete(temp_session)
+    await db.commit()
 
-    return {"message": "Temporary session cancelled", "id": temp_session_id}
+    return ORJSONResponse(
+        {"message": "Temporary session cancelled", "id": temp_session_id}
+    )
@@ -2,29 +2,99 @@
 API Routes for Source Management (Private and Public Channels)
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
-import uuid
 
+from app.api.serialization import paged_rows_response
 from app.core.database import get_db
+from app.core.ids import uuid7
+from app.models.scrape import ScrapeRun
 from app.models.source import Source as SourceModel, AccessLevelEnum
-from app.models.session import TelegramSession
+from app.models.session import ActiveStatus, TelegramSession
 from app.schemas.source import (
     SourceCreatePrivate,
     SourceCreatePublic,
     SourceResponse,
     SourceUpdate,
 )
-from app.services.encryption import encrypt_data, decrypt_data
+from app.services.api_credentials import (
+    ApiHashConflict,
+    get_or_create_api_credential,
+)
+from app.services.encryption import encrypt_data
 from app.services.prefect_client import prefect_client
 
 router = APIRouter(prefix="/sources", tags=["sources"])
 
 
+async def _api_credential(db: AsyncSession, api_id: int, api_hash: str):
+    """Shared credential for api_id; a mismatching api_hash is a 409"""
+    try:
+        return await get_or_create_api_credential(db, api_id, api_hash)
+    except ApiHashConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def _provision_prefect_resources(source_id: str, source_name: str, cron_schedule):
+    """Create the Prefect deployment and concurrency limit for a new source"""
+    # Create Prefect deployment
+    try:
+        prefect_client.create_deployment(
+            source_id=source_id,
+            source_name=source_name,
+            cron_schedule=cron_schedule,
+        )
+        print(f"✓ Created Prefect deployment for source {source_id}")
+    except Exception as e:
+        print(f"✗ Warning: Failed to create Prefect deployment: {e}")
+        import traceback
+
+        traceback.print_exc()
+
+    # Create concurrency limit for this source (prevents overlapping runs)
+    try:
+        print(f"Creating concurrency limit for source {source_id}...")
+        result = prefect_client.create_concurrency_limit(
+            source_id=source_id,
+            limit=1,  # Only 1 run per source at a time
+        )
+        if result:
+            print(f"✓ Concurrency limit created successfully")
+        else:
+            print(f"⚠️ Concurrency limit creation returned empty result")
+    except Exception as e:
+        print(f"✗ Warning: Failed to create concurrency limit: {e}")
+        import traceback
+
+        traceback.print_exc()
+
+
+def _teardown_prefect_resources(source_id: str):
+    """Remove the Prefect deployment and concurrency limit of a deleted source"""
+    # Delete Prefect deployment
+    try:
+        prefect_client.delete_deployment(source_id)
+    except Exception as e:
+        print(f"Warning: Failed to delete Prefect deployment: {e}")
+
+    # Delete concurrency limit
+    try:
+        prefect_client.delete_concurrency_limit(source_id)
+    except Exception as e:
+        print(f"Warning: Failed to delete concurrency limit: {e}")
+
+
 @router.post("/private", response_model=SourceResponse)
-def create_private_source(source: SourceCreatePrivate, db: Session = Depends(get_db)):
+async def create_private_source(
+    source: SourceCreatePrivate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Create a source for a PRIVATE channel using an existing session
 
@@ -35,24 +105,19 @@ def create_private_source(source: SourceCreatePrivate, db: Session = Depends(get
     4. This endpoint creates the source with session reference
     """
     # Verify session exists and is active
-    session = (
-        db.query(TelegramSession)
-        .filter(TelegramSession.id == source.session_id)
-        .first()
-    )
+    session = await db.get(TelegramSession, source.session_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if session.is_active != "active":
+    if session.is_active != ActiveStatus.ACTIVE:
         raise HTTPException(status_code=400, detail="Session is not active")
 
     # Create source
     new_source = SourceModel(
-        id=uuid.uuid4(),
+        id=uuid7(),
         name=source.name,
-        api_id=encrypt_data(str(source.api_id)),
-        api_hash=encrypt_data(source.api_hash),
+        api_credential=await _api_credential(db, source.api_id, source.api_hash),
         access_level=AccessLevelEnum.PRIVATE,
         identifier=str(source.channel_id),
         channel_title=source.channel_title,
@@ -61,50 +126,29 @@ def create_private_source(source: SourceCreatePrivate, db: Session = Depends(get
         target=source.target,
         target_path=source.target_path,
         schedule=source.schedule,
-        is_active="active",
+        is_active=ActiveStatus.ACTIVE,
     )
 
     db.add(new_source)
-    db.commit()
-    db.refresh(new_source)
-
-    # Create Prefect deployment
-    try:
-        prefect_client.create_deployment(
-            source_id=str(new_source.id),
-            source_name=new_source.name,
-            cron_schedule=new_source.schedule,
-        )
-        print(f"✓ Created Prefect deployment for source {new_source.id}")
-    except Exception as e:
-        print(f"✗ Warning: Failed to create Prefect deployment: {e}")
-        import traceback
-
-        traceback.print_exc()
-
-    # Create concurrency limit for this source (prevents overlapping runs)
-    try:
-        print(f"Creating concurrency limit for source {new_source.id}...")
-        result = prefect_client.create_concurrency_limit(
-            source_id=str(new_source.id),
-            
-            limit=1,  # Only 1 run per source at a time
-        )
-        if result:
-            print(f"✓ Concurrency limit created successfully")
-        else:
-            print(f"⚠️ Concurrency limit creation returned empty result")
-    except Exception as e:
-        print(f"✗ Warning: Failed to create concurrency limit: {e}")
-        import traceback
-
-        traceback.print_exc()
+    await db.commit()
+
+    # Provision Prefect resources after the response has been sent
+    background_tasks.add_task(
+        _provision_prefect_resources,
+        str(new_source.id),
+        new_source.name,
+        new_source.schedule,
+    )
 
     return new_source
 
 
 @router.post("/public", response_model=SourceResponse)
-def create_public_source(source: SourceCreatePublic, db: Session = Depends(get_db)):
+async def create_public_source(
+    source: SourceCreatePublic,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Create a source for a PUBLIC channel
 
@@ -112,10 +156,9 @@ def create_public_source(source: SourceCreatePublic, db: Session = Depends(get_d
     User provides channel username/ID and configuration.
     """
     new_source = SourceModel(
-        id=uuid.uuid4(),
+        id=uuid7(),
         name=source.name,
-        api_id=encrypt_data(str(source.api_id)),
-        api_hash=encrypt_data(source.api_hash),
+        api_credential=await _api_credential(db, source.api_id, source.api_hash),
         access_level=AccessLevelEnum.PUBLIC,
         identifier=source.channel_username,
         bot_token=encrypt_data(source.bot_token) if source.bot_token else None,
@@ -123,67 +166,60 @@ def create_public_source(source: SourceCreatePublic, db: Session = Depends(get_d
         target=source.target,
         target_path=source.target_path,
         schedule=source.schedule,
-        is_active="active",
+        is_active=ActiveStatus.ACTIVE,
     )
 
     db.add(new_source)
-    db.commit()
-    db.refresh(new_source)
-
-    # Create Prefect deployment
-    try:
-        prefect_client.create_deployment(
-            source_id=str(new_source.id),
-            source_name=new_source.name,
-            cron_schedule=new_source.schedule,
-        )
-        print(f"✓ Created Prefect deployment for source {new_source.id}")
-    except Exception as e:
-        print(f"✗ Warning: Failed to create Prefect deployment: {e}")
-        import traceback
-
-        traceback.print_exc()
-
-    # Create concurrency limit for this source (prevents overlapping runs)
-    try:
-        print(f"Creating concurrency limit for source {new_source.id}...")
-        result = prefect_client.create_concurrency_limit(
-            source_id=str(new_source.id),
-            limit=1,  # Only 1 run per source at a time
-        )
-        if result:
-            print(f"✓ Concurrency limit created successfully")
-        else:
-            print(f"⚠️ Concurrency limit creation returned empty result")
-    except Exception as e:
-        print(f"✗ Warning: Failed to create concurrency limit: {e}")
-        import traceback
-
-        traceback.print_exc()
+    await db.commit()
+
+    # Provision Prefect resources after the response has been sent
+    background_tasks.add_task(
+        _provision_prefect_resources,
+        str(new_source.id),
+        new_source.name,
+        new_source.schedule,
+    )
 
     return new_source
 
 
 @router.get("/", response_model=List[SourceResponse])
-def read_sources(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all sources"""
-    sources = db.query(SourceModel).offset(skip).limit(limit).all()
-    return sources
+async def read_sources(
+    after_id: Optional[UUID] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get all sources
+
+    Pass the X-Next-Cursor header of the previous page as after_id to page
+    by key; skip is kept for existing clients.
+    """
+    stmt = select(SourceModel).order_by(SourceModel.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(SourceModel.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+    sources = (await db.scalars(stmt)).all()
+    return paged_rows_response(sources, SourceResponse, limit)
 
 
 @router.get("/{source_id}", response_model=SourceResponse)
-def read_source(source_id: UUID, db: Session = Depends(get_db)):
+async def read_source(source_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get a specific source"""
-    db_source = db.query(SourceModel).filter(SourceModel.id == source_id).first()
+    db_source = await db.get(SourceModel, source_id)
     if db_source is None:
         raise HTTPException(status_code=404, detail="Source not found")
     return db_source
 
 
 @router.put("/{source_id}", response_model=SourceResponse)
-def update_source(source_id: UUID, source: SourceUpdate, db: Session = Depends(get_db)):
+async def update_source(
+    source_id: UUID, source: SourceUpdate, db: AsyncSession = Depends(get_db)
+):
     """Update a source"""
-    db_source = db.query(SourceModel).filter(SourceModel.id == source_id).first()
+    db_source = await db.get(SourceModel, source_id)
     if db_source is None:
         raise HTTPException(status_code=404, detail="Source not found")
 
@@ -193,19 +229,28 @@ def update_source(source_id: UUID, source: SourceUpdate, db: Session = Depends(g
     if source.schedule is not None:
         db_source.schedule = source.schedule
     if source.file_types:
+        if set(source.file_types) != set(db_source.file_types or []):
+            # Runs only ask Telegram for messages above the last scan
+            # watermark; clear it so older messages are checked against the
+            # new file types on the next run
+            await db.execute(
+                update(ScrapeRun)
+                .where(ScrapeRun.source_id == source_id)
+                .values(last_scanned_message_id=None)
+            )
         db_source.file_types = source.file_types
     if source.target_path is not None:
         db_source.target_path = source.target_path
     if source.is_active:
         db_source.is_active = source.is_active
 
-    db.commit()
-    db.refresh(db_source)
+    await db.commit()
 
     # Update Prefect deployment with new schedule
     if source.schedule is not None:
         try:
-            prefect_client.update_deployment(
+            await run_in_threadpool(
+                prefect_client.update_deployment,
                 source_id=str(db_source.id),
                 source_name=db_source.name,
                 cron_schedule=db_source.schedule,
@@ -217,42 +262,41 @@ def update_source(source_id: UUID, source: SourceUpdate, db: Session = Depends(g
 
 
 @router.delete("/{source_id}")
-def delete_source(source_id: UUID, db: Session = Depends(get_db)):
+async def delete_source(
+    source_id: UUID,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+):
     """Delete a source and its Prefect deployment"""
-    db_source = db.query(SourceModel).filter(SourceModel.id == source_id).first()
+    db_source = await db.get(SourceModel, source_id)
     if db_source is None:
         raise HTTPException(status_code=404, detail="Source not found")
 
-    # Delete Prefect deployment
-    try:
-        prefect_client.delete_deployment(str(source_id))
-    except Exception as e:
-        print(f"Warning: Failed to delete Prefect deployment: {e}")
-
-    # Delete concurrency limit
-    try:
-        prefect_client.delete_concurrency_limit(str(source_id))
-    except Exception as e:
-        print(f"Warning: Failed to delete concurrency limit: {e}")
-
     # Delete source from database
-    db.delete(db_source)
-    db.commit()
+    await db.delete(db_source)
+    await db.commit()
 
-    return {"message": f"Source {source_id} deleted successfully"}
+    # Remove Prefect resources after the response has been sent
+    background_tasks.add_task(_teardown_prefect_resources, str(source_id))
+
+    return ORJSONResponse({"message": f"Source {source_id} deleted successfully"})
 
 
 @router.post("/{source_id}/trigger")
-def trigger_source_flow(source_id: UUID, db: Session = Depends(get_db)):
+async def trigger_source_flow(source_id: UUID, db: AsyncSession = Depends(get_db)):
     """Manually trigger a source scraping job"""
-    db_source = db.query(SourceModel).filter(SourceModel.id == source_id).first()
+    db_source = await db.get(SourceModel, source_id)
     if db_source is None:
         raise HTTPException(status_code=404, detail="Source not found")
 
     # Trigger the Prefect flow using the deployment name
     deployment_name = f"source-{source_id}"
     try:
-        result = prefect_client.trigger_flow(deployment_name, str(source_id))
-        return {"message": f"Triggered flow for source {source_id}", "result": result}
+        result = await run_in_threadpool(
+            prefect_client.trigger_flow, deployment_name, str(source_id)
+        )
+        return ORJSONResponse(
+            {"message": f"Triggered flow for source {source_id}", "result": result}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to trigger flow: {str(e)}")
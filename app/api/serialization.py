@@ -0,0 +1,94 @@
+"""
+Helpers for serializing ORM rows straight into JSON responses
+"""
+
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Tuple, Type
+
+import orjson
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+from app.core.database import AsyncSessionLocal
+
+# Response header carrying the keyset cursor (last id) of a full page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@lru_cache(maxsize=None)
+def _schema_getter(
+    schema: Type[BaseModel],
+) -> Tuple[Tuple[str, ...], Callable[[Any], Tuple[Any, ...]]]:
+    """
+    Build the field names and a single attrgetter for a response schema once,
+    instead of walking model_fields for every row.
+    """
+    fields = tuple(schema.model_fields)
+    getter = attrgetter(*fields)
+    if len(fields) == 1:
+        return fields, lambda row: (getter(row),)
+    return fields, getter
+
+
+def row_to_dict(row: Any, schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Project an ORM row onto the fields declared by a response schema."""
+    fields, getter = _schema_getter(schema)
+    return dict(zip(fields, getter(row)))
+
+
+def rows_response(rows: Iterable[Any], schema: Type[BaseModel]) -> ORJSONResponse:
+    """
+    Build an ORJSONResponse from ORM rows without going through
+    jsonable_encoder. orjson handles UUID, datetime and Enum values natively.
+
+    Returning a Response instance also skips FastAPI's response_model
+    validation, so routes can keep response_model for the OpenAPI schema.
+    """
+    fields, getter = _schema_getter(schema)
+    content: List[Dict[str, Any]] = [dict(zip(fields, getter(row))) for row in rows]
+    return ORJSONResponse(content=content)
+
+
+def paged_rows_response(
+    rows: List[Any], schema: Type[BaseModel], limit: int
+) -> ORJSONResponse:
+    """
+    rows_response for a keyset-paginated list. When the page is full, the id
+    of its last row is sent in the X-Next-Cursor header to be passed back
+    as after_id.
+    """
+    response = rows_response(rows, schema)
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1].id)
+    return response
+
+
+def stream_rows_response(
+    stmt: Select, schema: Type[BaseModel], batch_size: int = 500
+) -> StreamingResponse:
+    """
+    Stream the rows of a select as a JSON array.
+
+    Rows are fetched through a server-side cursor in batches of batch_size
+    and encoded one at a time, so memory stays bounded by the batch rather
+    than the result size. The stream owns its own session because the
+    request's session may be closed before the body is sent.
+    """
+    fields, getter = _schema_getter(schema)
+
+    async def body() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream_scalars(
+                stmt.execution_options(yield_per=batch_size)
+            )
+            yield b"["
+            first = True
+            async for row in result:
+                item = orjson.dumps(dict(zip(fields, getter(row))))
+                yield item if first else b"," + item
+                first = False
+            yield b"]"
+
+    return StreamingResponse(body(), media_type="application/json")
@@ -1,12 +1,23 @@
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional override for the API's async engine; derived from DATABASE_URL
+# (postgresql+asyncpg) when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 
+# Telegram API - number of connected Telethon clients kept warm for the
+# channels/test endpoints (least recently used clients are disconnected)
+TELEGRAM_CLIENT_POOL_SIZE = int(os.getenv("TELEGRAM_CLIENT_POOL_SIZE", "32"))
+# Within this many seconds of a full authorization check, testing a pooled
+# session only pings the open connection
+TELEGRAM_SESSION_VERIFY_TTL = int(os.getenv("TELEGRAM_SESSION_VERIFY_TTL", "3600"))
+
 # Prefect Configuration
 PREFECT_API_URL = os.getenv("PREFECT_API_URL")
 
@@ -20,6 +31,48 @@ NAS_PORT = int(os.getenv("NAS_PORT", "445"))
 # Telegram Scraper - Batch and Concurrency Settings
 MAX_FILES_PER_RUN = int(os.getenv("MAX_FILES_PER_RUN", "10"))
 DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "3"))
+# Downloaded files processed (extracted, stored, recorded) at once
+PROCESS_CONCURRENCY = int(os.getenv("PROCESS_CONCURRENCY", "10"))
+# Within that, separate ceilings for CPU-bound archive extraction and for
+# storing regular files (copy/upload)
+HASH_CONCURRENCY = int(os.getenv("HASH_CONCURRENCY", str(os.cpu_count() or 1)))
+STORE_CONCURRENCY = int(os.getenv("STORE_CONCURRENCY", "8"))
+# Scraped-file records are inserted in batches of this many rows by the
+# orchestrator (0 records each file in its own transaction)
+SCRAPED_FILE_BATCH_SIZE = int(os.getenv("SCRAPED_FILE_BATCH_SIZE", "100"))
+# Documents of at least DOWNLOAD_PARALLEL_MIN_SIZE bytes are fetched as this
+# many byte ranges in parallel (1 disables parallel-part downloads)
+DOWNLOAD_PARALLEL_PARTS = int(os.getenv("DOWNLOAD_PARALLEL_PARTS", "4"))
+DOWNLOAD_PARALLEL_MIN_SIZE = int(
+    os.getenv("DOWNLOAD_PARALLEL_MIN_SIZE", str(10 * 1024 * 1024))
+)  # 10 MB
+# Write documents fetched with download_media through O_DIRECT, bypassing
+# the page cache (Linux only)
+DOWNLOAD_DIRECT_IO = sys.platform.startswith("linux") and os.getenv(
+    "DOWNLOAD_DIRECT_IO", "false"
+).lower() in ("1", "true")
+# Upload regular documents to storage while they download, without a temp
+# file (archives and parallel-part downloads still go through disk)
+STREAM_UPLOADS = os.getenv("STREAM_UPLOADS", "false").lower() in ("1", "true")
+# Directory for a run's scratch downloads, e.g. /dev/shm to keep them in RAM
+# (empty uses the system temp dir). Runs that would not fit fall back to it
+DOWNLOADER_TEMP_ROOT = os.getenv("DOWNLOADER_TEMP_ROOT", "")
+# Worker processes for extracting and storing archives (0 keeps it on a
+# thread in the flow process)
+ARCHIVE_PROCESS_WORKERS = int(os.getenv("ARCHIVE_PROCESS_WORKERS", "0"))
+
+# Algorithm for stored file checksums: sha256 or blake3 (needs the blake3
+# package). Archive checksums stay SHA-256 so duplicate detection keeps
+# matching earlier runs
+FILE_CHECKSUM_ALGORITHM = os.getenv("FILE_CHECKSUM_ALGORITHM", "sha256").lower()
+
+# Skip files whose Telegram file id is already stored for the source from
+# another message (reposts and forwards). Turn off for verification runs
+# that should download and checksum everything again
+SKIP_KNOWN_FILE_IDS = os.getenv("SKIP_KNOWN_FILE_IDS", "true").lower() in (
+    "1",
+    "true",
+)
 
 # Telegram Scraper - Retry Settings
 DOWNLOAD_RETRY_ATTEMPTS = int(os.getenv("DOWNLOAD_RETRY_ATTEMPTS", "3"))
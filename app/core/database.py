@@ -1,17 +1,42 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from app.core.config import DATABASE_URL, ASYNC_DATABASE_URL
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Pool settings shared by both engines: pre-ping drops connections the
+# server closed while idle, recycle avoids holding them forever, and LIFO
+# keeps reusing the warmest connections so surplus ones can idle out
+POOL_OPTIONS = dict(
+    pool_size=20,
+    max_overflow=40,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+)
+
+# Sync engine: used by Prefect flows, background jobs and create_all
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
+# Flow tasks mostly read, and their objects are used after the session
+# closes, so keep loaded attributes instead of expiring them on commit
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 Base = declarative_base()
 
+# Async engine (asyncpg): used by the API routes so DB round-trips don't
+# block the event loop while other requests are awaiting Telegram
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL or make_url(DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    **POOL_OPTIONS,
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 
 # Dependency to get a DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
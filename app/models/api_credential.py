@@ -0,0 +1,23 @@
+"""
+Telegram API credentials shared by sessions and sources
+"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+import uuid
+
+
+class TelegramApiCredential(Base):
+    """One encrypted api_hash per Telegram api_id"""
+
+    __tablename__ = "telegram_api_credentials"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    api_id = Column(BigInteger, nullable=False, unique=True)  # Telegram API ID
+    api_hash = Column(Text, nullable=False)  # Encrypted Telegram API hash
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<TelegramApiCredential {self.api_id}>"
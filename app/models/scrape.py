@@ -1,20 +1,24 @@
-import uuid
-from datetime import datetime, timezone
-
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
     String,
     DateTime,
     Enum as SQLAlchemyEnum,
     ForeignKey,
+    Index,
     Integer,
     JSON,
     UniqueConstraint,
+    desc,
+    event,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.core.ids import uuid7
 import enum
 
 
@@ -35,47 +39,65 @@ class LogLevel(str, enum.Enum):
 
 class ScrapeRun(Base):
     __tablename__ = "scrape_runs"
+    # Fetch server-generated columns with RETURNING on flush instead of a
+    # follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Serves list_runs_for_source (newest runs of a source) without a sort
+        Index("ix_scraperun_source_started", "source_id", desc("started_at")),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     source_id = Column(UUID(as_uuid=True), ForeignKey("sources.id"), nullable=False)
     flow_run_id = Column(String, nullable=True, index=True)
     status = Column(SQLAlchemyEnum(ScrapeStatus), default=ScrapeStatus.PENDING)
-    started_at = Column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
-    )
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
     finished_at = Column(DateTime(timezone=True), nullable=True)
     total_files_found = Column(Integer, default=0)
     total_files_processed = Column(Integer, default=0)
+    # Scan watermark: every channel message up to this id was skipped or
+    # processed when this run scanned; the next scan starts above it
+    last_scanned_message_id = Column(BigInteger, nullable=True)
     notes = Column(String, nullable=True)
 
     source = relationship("Source", back_populates="runs")
-    logs = relationship("ScrapeLog", back_populates="run", cascade="all, delete-orphan")
+    logs = relationship(
+        "ScrapeLog",
+        back_populates="run",
+        cascade="all, delete-orphan",
+        order_by="[ScrapeLog.timestamp, ScrapeLog.id]",
+    )
     files = relationship(
-        "ScrapedFile", back_populates="run", cascade="all, delete-orphan"
+        "ScrapedFile",
+        back_populates="run",
+        cascade="all, delete-orphan",
+        order_by="[ScrapedFile.processed_at, ScrapedFile.id]",
     )
 
 
 class ScrapedFile(Base):
     __tablename__ = "scraped_files"
+    # Fetch server-generated columns with RETURNING on flush instead of a
+    # follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     run_id = Column(UUID(as_uuid=True), ForeignKey("scrape_runs.id"), nullable=False)
     source_id = Column(UUID(as_uuid=True), ForeignKey("sources.id"), nullable=False)
-    message_id = Column(Integer, nullable=False)
+    message_id = Column(BigInteger, nullable=False)
     file_id = Column(String, nullable=False)
     file_name = Column(String, nullable=False)
     file_extension = Column(String, nullable=True)
     storage_path = Column(String, nullable=False)
-    checksum = Column(String, nullable=True)
-    archive_checksum = Column(
-        String(64), nullable=True, index=True
-    )  # SHA256 of archive file
-    size_bytes = Column(Integer, nullable=True)
+    checksum = Column(String(64), nullable=True)  # SHA256 or BLAKE3 hex digest
+    archive_checksum = Column(String(64), nullable=True)  # SHA256 of archive file
+    size_bytes = Column(BigInteger, nullable=True)
     extracted_from = Column(String, nullable=True)
-    extra_metadata = Column(JSON, default=dict)
-    processed_at = Column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
-    )
+    # Path of an archive member inside its archive; every member of one
+    # archive shares the other key columns
+    member_path = Column(String, nullable=True)
+    extra_metadata = Column(JSONB, default=dict)
+    processed_at = Column(DateTime(timezone=True), server_default=func.now())
 
     run = relationship("ScrapeRun", back_populates="files")
     source = relationship("Source", back_populates="files")
@@ -86,21 +108,70 @@ class ScrapedFile(Base):
             "message_id",
             "file_id",
             "extracted_from",
+            "member_path",
             name="uix_source_message_file",
         ),
+        # get_run_files: files of a run in processing order
+        Index("ix_scraped_files_run_processed", "run_id", "processed_at"),
+        # get_processed_archive_checksums: index-only scan of a source's
+        # archive checksums
+        Index(
+            "ix_scraped_files_source_archive_ck",
+            "source_id",
+            "archive_checksum",
+            postgresql_where=archive_checksum.isnot(None),
+        ),
+        # Containment (@>) lookups on file metadata
+        Index(
+            "idx_scraped_files_meta",
+            "extra_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"extra_metadata": "jsonb_path_ops"},
+        ),
     )
 
 
+# Number of hash partitions of scrape_logs
+SCRAPE_LOG_PARTITIONS = 8
+
+
 class ScrapeLog(Base):
     __tablename__ = "scrape_logs"
-
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    run_id = Column(UUID(as_uuid=True), ForeignKey("scrape_runs.id"), nullable=False)
-    timestamp = Column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    # Fetch server-generated columns with RETURNING on flush instead of a
+    # follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    # bigserial: logs are high-volume and never referenced from elsewhere.
+    # run_id is part of the key because scrape_logs is partitioned by it.
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    run_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("scrape_runs.id"),
+        primary_key=True,
+        nullable=False,
     )
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
     level = Column(SQLAlchemyEnum(LogLevel), default=LogLevel.INFO)
     message = Column(String, nullable=False)
     details = Column(JSON, nullable=True)
 
     run = relationship("ScrapeRun", back_populates="logs")
+
+    __table_args__ = (
+        # Logs are always read per run in time order
+        Index("ix_scrape_logs_run_time", "run_id", "timestamp"),
+        # Per-run reads touch a single partition
+        {"postgresql_partition_by": "HASH (run_id)"},
+    )
+
+
+for _remainder in range(SCRAPE_LOG_PARTITIONS):
+    event.listen(
+        ScrapeLog.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE IF NOT EXISTS scrape_logs_p{_remainder} "
+            f"PARTITION OF scrape_logs FOR VALUES WITH "
+            f"(MODULUS {SCRAPE_LOG_PARTITIONS}, REMAINDER {_remainder})"
+        ).execute_if(dialect="postgresql"),
+    )
@@ -1,15 +1,40 @@
-from sqlalchemy import Column, String, DateTime, LargeBinary, Integer, Text, Enum
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.api_credential import TelegramApiCredential
+import enum
 import uuid
 
 
+class ActiveStatus(str, enum.Enum):
+    """Lifecycle status shared by sessions and sources"""
+
+    ACTIVE = "active"
+    INACTIVE = "inactive"
+    EXPIRED = "expired"
+    REVOKED = "revoked"
+
+
+# Native postgres enum storing the lowercase values already used in the data
+ActiveStatusType = Enum(
+    ActiveStatus,
+    name="active_status",
+    values_callable=lambda members: [member.value for member in members],
+)
+
+
 class TelegramSession(Base):
     """Model for storing Telegram session files"""
 
     __tablename__ = "telegram_sessions"
+    # Fetch server-generated columns (created_at, updated_at) with RETURNING
+    # on flush instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)  # User-friendly name for the session
     phone_number = Column(
         String, nullable=False, unique=True
@@ -17,9 +42,15 @@ class TelegramSession(Base):
     session_string = Column(
         Text, nullable=False
     )  # Encrypted Telethon StringSession data
-    api_id = Column(Integer, nullable=False)  # Telegram API ID
-    api_hash = Column(String, nullable=False)  # Encrypted Telegram API hash
-    is_active = Column(String, default="active")  # active, expired, revoked
+    api_credential_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("telegram_api_credentials.id"),
+        nullable=False,
+        index=True,
+    )
+    is_active = Column(
+        ActiveStatusType, nullable=False, default=ActiveStatus.ACTIVE
+    )  # active, expired, revoked
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_checked_at = Column(DateTime(timezone=True), nullable=True)
@@ -28,5 +59,10 @@ class TelegramSession(Base):
         nullable=True,
     )
 
+    # Shared credentials, loaded with the session in the same query
+    api_credential = relationship(TelegramApiCredential, lazy="joined", innerjoin=True)
+    api_id = association_proxy("api_credential", "api_id")  # Telegram API ID
+    api_hash = association_proxy("api_credential", "api_hash")  # Encrypted
+
     def __repr__(self):
         return f"<TelegramSession {self.name} - {self.phone_number}>"
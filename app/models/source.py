@@ -1,17 +1,19 @@
-import uuid
 from sqlalchemy import (
     Column,
     String,
     DateTime,
-    JSON,
     Enum as SQLAlchemyEnum,
     ForeignKey,
-    Integer,
+    BigInteger,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.ids import uuid7
+from app.models.api_credential import TelegramApiCredential
+from app.models.session import ActiveStatus, ActiveStatusType
 import enum
 
 
@@ -28,13 +30,23 @@ class AccessLevelEnum(str, enum.Enum):
 
 class Source(Base):
     __tablename__ = "sources"
+    # Fetch server-generated columns (created_at, updated_at) with RETURNING
+    # on flush instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name = Column(String, nullable=False, index=True)
 
-    # Telegram API credentials (required for all sources)
-    api_id = Column(String, nullable=False)  # Encrypted
-    api_hash = Column(String, nullable=False)  # Encrypted
+    # Telegram API credentials (required for all sources), shared per api_id
+    api_credential_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("telegram_api_credentials.id"),
+        nullable=False,
+        index=True,
+    )
+    api_credential = relationship(TelegramApiCredential, lazy="joined", innerjoin=True)
+    api_id = association_proxy("api_credential", "api_id")
+    api_hash = association_proxy("api_credential", "api_hash")  # Encrypted
 
     # Channel information
     access_level = Column(SQLAlchemyEnum(AccessLevelEnum), nullable=False)
@@ -42,7 +54,9 @@ class Source(Base):
     channel_title = Column(String)  # Display name of the channel
 
     # Session reference (for private channels)
-    session_ref = Column(String, ForeignKey("telegram_sessions.id"), nullable=True)
+    session_ref = Column(
+        UUID(as_uuid=True), ForeignKey("telegram_sessions.id"), nullable=True
+    )
     session = relationship("TelegramSession", backref="sources")
     runs = relationship(
         "ScrapeRun", back_populates="source", cascade="all, delete-orphan"
@@ -55,13 +69,13 @@ class Source(Base):
     bot_token = Column(String, nullable=True)  # Encrypted
 
     # Scraping configuration
-    file_types = Column(JSON, default=list)  # ['pdf', 'zip', 'jpg']
+    file_types = Column(JSONB, default=list)  # ['pdf', 'zip', 'jpg']
     target = Column(SQLAlchemyEnum(TargetEnum), nullable=False)
     target_path = Column(String)  # Specific path in target storage
 
     # Scheduling
     schedule = Column(String)  # Cron expression
-    is_active = Column(String, default="active")
+    is_active = Column(ActiveStatusType, nullable=False, default=ActiveStatus.ACTIVE)
 
     # Metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -69,5 +83,5 @@ class Source(Base):
     last_scraped_at = Column(DateTime(timezone=True))
 
     # Statistics
-    total_messages_scraped = Column(Integer, default=0)
-    total_files_downloaded = Column(Integer, default=0)
+    total_messages_scraped = Column(BigInteger, default=0)
+    total_files_downloaded = Column(BigInteger, default=0)
@@ -2,7 +2,9 @@
 Temporary session model for storing pending OTP verifications
 """
 
-from sqlalchemy import Column, String, DateTime, Integer
+from sqlalchemy import Column, String, DateTime, Index, Integer, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -14,19 +16,36 @@ class TempSession(Base):
 
     __tablename__ = "temp_sessions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     phone_number = Column(String, nullable=False)
     api_id = Column(Integer, nullable=False)
     api_hash = Column(String, nullable=False)  # Encrypted
     session_string = Column(String, nullable=False)  # Encrypted temporary session
     phone_code_hash = Column(String, nullable=False)  # For OTP verification
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    # OTP sessions expire after 10 minutes unless the caller sets otherwise
+    expires_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=text("now() + interval '10 minutes'"),
+    )
+
+    # now() is not immutable, so a partial "live rows" index is impossible;
+    # a plain btree on expires_at serves both the cleanup sweep and the
+    # expiry checks, and phone_number covers lookups by phone
+    __table_args__ = (
+        Index("ix_temp_sessions_expires", "expires_at"),
+        Index("ix_temp_sessions_phone", "phone_number"),
+    )
 
     def __repr__(self):
         return f"<TempSession {self.phone_number}>"
 
-    @property
+    @hybrid_property
     def is_expired(self):
         """Check if temporary session has expired"""
         return datetime.now(timezone.utc) > self.expires_at
+
+    @is_expired.expression
+    def is_expired(cls):
+        return cls.expires_at <= func.now()
@@ -3,31 +3,44 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 from prefect import flow, get_run_logger, task
-
-from app.core.database import SessionLocal
-from app.models.session import TelegramSession
+from prefect.artifacts import create_markdown_artifact
+from prefect.task_runners import ConcurrentTaskRunner
+from sqlalchemy import Boolean, case, cast, column, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import SessionLocal, engine
+from app.models.api_credential import TelegramApiCredential
+from app.models.session import ActiveStatus, ActiveStatusType, TelegramSession
 from app.services.encryption import decrypt_data
 from app.services.telegram_client import TelegramClientService
 
 
-@task
-def fetch_sessions() -> List[Dict[str, Any]]:
-    """Load all Telegram sessions from the database."""
-    with SessionLocal() as db:
-        sessions = db.query(TelegramSession).all()
-        return [
-            {
-                "id": session.id,
-                "api_id": session.api_id,
-                "api_hash": session.api_hash,
-                "session_string": session.session_string,
-                "current_status": session.is_active,
-            }
-            for session in sessions
-        ]
+def iter_session_batches(batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream Telegram sessions from the database in batches.
+
+    Uses a server-side cursor so only batch_size rows are held at a time and
+    the first validations can start before the whole table has been read.
+    """
+    # Plain column rows: no ORM hydration or identity map for a read-only scan
+    stmt = (
+        select(
+            TelegramSession.id,
+            TelegramApiCredential.api_id,
+            TelegramApiCredential.api_hash,
+            TelegramSession.session_string,
+            TelegramSession.is_active.label("current_status"),
+        )
+        .join(TelegramSession.api_credential)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    # Core connection: nothing here needs the ORM unit of work
+    with engine.connect() as conn:
+        for partition in conn.execute(stmt).mappings().partitions():
+            yield [dict(row) for row in partition]
 
 
 @task
@@ -65,44 +78,79 @@ def persist_results(results: List[Dict[str, Any]]):
     logger = get_run_logger()
     now = datetime.now(timezone.utc)
 
-    with SessionLocal() as db:
-        for result in results:
-            session = (
-                db.query(TelegramSession)
-                .filter(TelegramSession.id == result["id"])
-                .first()
-            )
-            if not session:
-                logger.warning("Session %s not found during persistence", result["id"])
-                continue
-
-            session.is_active = "active" if result.get("is_valid") else "expired"
-            session.last_checked_at = now
-
-            if not result.get("is_valid") and result.get("error"):
-                logger.info(
-                    "Session %s marked inactive due to error: %s",
-                    session.id,
-                    result["error"],
-                )
+    if not results:
+        return
+
+    # One UPDATE ... FROM (VALUES ...) for the whole batch; RETURNING tells us
+    # which sessions no longer exist without a separate lookup or race window
+    statuses = values(
+        column("id", UUID(as_uuid=True)),
+        column("is_valid", Boolean),
+        name="v",
+    ).data([(result["id"], bool(result.get("is_valid"))) for result in results])
+    stmt = (
+        update(TelegramSession)
+        .where(TelegramSession.id == statuses.c.id)
+        .values(
+            is_active=cast(
+                case(
+                    (statuses.c.is_valid, ActiveStatus.ACTIVE.value),
+                    else_=ActiveStatus.EXPIRED.value,
+                ),
+                ActiveStatusType,
+            ),
+            last_checked_at=now,
+        )
+        .returning(TelegramSession.id)
+        .execution_options(synchronize_session=False)
+    )
 
+    with SessionLocal() as db:
+        updated_ids = set(db.scalars(stmt))
         db.commit()
 
+    # One log call per outcome instead of one per session: each run-logger
+    # call is shipped to the Prefect API
+    missing_ids = [str(r["id"]) for r in results if r["id"] not in updated_ids]
+    error_events = [
+        r
+        for r in results
+        if r["id"] in updated_ids and not r.get("is_valid") and r.get("error")
+    ]
+
+    if missing_ids:
+        logger.warning(
+            "Sessions not found during persistence: count=%d ids=%s",
+            len(missing_ids),
+            missing_ids[:100],
+        )
+    if error_events:
+        logger.info("Sessions marked inactive due to errors: %d", len(error_events))
+        create_markdown_artifact(
+            key="session-health-errors",
+            markdown="\n".join(
+                ["| Session | Error |", "| --- | --- |"]
+                + [f"| {r['id']} | {r['error']} |" for r in error_events]
+            ),
+            description="Sessions marked inactive during the health check",
+        )
+
 
-@flow(name="session-health-check")
+@flow(name="session-health-check", task_runner=ConcurrentTaskRunner())
 def session_health_check_flow() -> List[Dict[str, Any]]:
     """Prefect flow entry point for session health validation."""
     logger = get_run_logger()
-    payload_future = fetch_sessions()
-    session_payloads = payload_future.result()
 
-    if not session_payloads:
+    # Submit validations batch by batch as rows stream in so the Telegram
+    # round-trips overlap; results are only collected once all are in flight
+    validation_futures = []
+    for session_payloads in iter_session_batches():
+        validation_futures.extend(validate_session.map(session_payloads))
+
+    if not validation_futures:
         logger.info("No Telegram sessions found for validation.")
         return []
 
-    validation_futures = [
-        validate_session.submit(payload) for payload in session_payloads
-    ]
     validation_results = [future.result() for future in validation_futures]
 
     persist_future = persist_results.submit(validation_results)
@@ -1,18 +1,42 @@
 import asyncio
+import hashlib
+import multiprocessing
 import os
+import random
+import shutil
 import tempfile
-from dataclasses import asdict, dataclass
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing, asynccontextmanager, nullcontext
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from functools import cached_property, lru_cache
+from itertools import islice
+from pathlib import Path, PurePosixPath
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
+import msgspec
 from prefect import flow, task, get_run_logger
 from prefect.concurrency.sync import concurrency
 from prefect.context import get_run_context
 from prefect.exceptions import CancelledRun
+from sqlalchemy.orm import joinedload
 from telethon import TelegramClient  # type: ignore[import]
+from telethon.errors import FloodWaitError  # type: ignore[import]
 from telethon.sessions import StringSession  # type: ignore[import]
-from telethon.tl.types import PeerChannel  # type: ignore[import]
+from telethon.tl.types import (  # type: ignore[import]
+    MessageMediaDocument,
+    MessageMediaPhoto,
+    PeerChannel,
+)
+from telethon.utils import get_input_peer  # type: ignore[import]
 
 try:  # pragma: no cover - fallback for typing environments without rpcerrorlist stubs
     from telethon.errors.rpcerrorlist import TimeoutError as TelethonTimeoutError  # type: ignore[import]
@@ -27,32 +51,57 @@ except ImportError:  # pragma: no cover
 
 from app.core.database import SessionLocal
 from app.models.source import AccessLevelEnum, Source, TargetEnum
-from app.models.session import TelegramSession
 from app.services.encryption import decrypt_data
 from app.services.file_utils import (
-    ARCHIVE_MULTI_SUFFIXES,
-    filter_allowed_files,
+    BackgroundWriter,
+    ChunkQueueReader,
+    DirectWriter,
+    HashingReader,
+    HashingWriter,
+    allowed_file_filter,
+    archive_multi_suffix,
+    archive_stem,
+    file_suffix,
     is_archive,
-    sha256_checksum,
-    extract_archive,
-    extract_archive_recursive,
+    new_hasher,
+    extract_archive_stream,
     extract_password_from_message,
 )
 from app.services.scrape_progress import (
+    LogBuffer,
     LogLevel,
     ScrapeStatus,
     create_scrape_run,
-    get_processed_file_keys,
+    get_last_scanned_message_id,
+    get_processed_file_keys_in,
     get_processed_archive_checksums,
-    log_event,
+    get_recorded_file_ids,
     mark_run_complete,
     record_scraped_file,
+    record_scraped_files,
     update_run_counts,
 )
-from app.services.storage import get_storage_handler
+from app.services.storage import (
+    StorageHandler,
+    get_storage_handler,
+    store_archive_in_process,
+    store_archive_members,
+)
 from app.core.config import (
     MAX_FILES_PER_RUN,
     DOWNLOAD_CONCURRENCY,
+    PROCESS_CONCURRENCY,
+    HASH_CONCURRENCY,
+    STORE_CONCURRENCY,
+    DOWNLOAD_PARALLEL_MIN_SIZE,
+    DOWNLOAD_PARALLEL_PARTS,
+    ARCHIVE_PROCESS_WORKERS,
+    DOWNLOAD_DIRECT_IO,
+    DOWNLOADER_TEMP_ROOT,
+    STREAM_UPLOADS,
+    FILE_CHECKSUM_ALGORITHM,
+    SKIP_KNOWN_FILE_IDS,
+    SCRAPED_FILE_BATCH_SIZE,
     DOWNLOAD_RETRY_ATTEMPTS,
     DOWNLOAD_RETRY_BASE_DELAY,
     DOWNLOAD_TIMEOUT_PER_FILE,
@@ -61,13 +110,51 @@ from app.core.config import (
 )
 
 
-def _chunked(sequence: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
-    for index in range(0, len(sequence), size):
-        yield sequence[index : index + size]
+# Telegram serves file parts in requests of at most 512 KB
+DOWNLOAD_PART_SIZE = 512 * 1024
+# GetFile requests allowed in flight on one client
+MAX_INFLIGHT_PARTS = 8
+# Upper bound for the jittered delay between download retries (seconds)
+MAX_RETRY_DELAY = 300
+# FLOOD_WAITs honoured per file (they don't use up DOWNLOAD_RETRY_ATTEMPTS),
+# and the longest wait worth sleeping through instead of leaving the file
+# to the next run
+MAX_FLOOD_WAITS = 5
+MAX_FLOOD_WAIT_SECONDS = 15 * 60
+# Messages scanned per run (newest first)
+SCAN_MESSAGE_LIMIT = 500
+# Retries of a failed process_downloaded_file, and the pause between them
+PROCESS_FILE_RETRIES = 2
+PROCESS_FILE_RETRY_DELAY = 60
+# Least seconds between run progress (files processed) updates while processing
+PROGRESS_UPDATE_INTERVAL = 2.0
+
+
+_ARCHIVE_POOL: Optional[ProcessPoolExecutor] = None
+# Run logs are written in batches off the calling thread; finalize_run
+# flushes what is left
+_LOG_BUFFER = LogBuffer()
+
+
+def _archive_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for archive extraction, created on first use. Spawned
+    rather than forked: the flow process holds threads, event loops and
+    database connections that must not be copied into children.
+    """
+    global _ARCHIVE_POOL
+    if _ARCHIVE_POOL is None:
+        _ARCHIVE_POOL = ProcessPoolExecutor(
+            max_workers=ARCHIVE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _ARCHIVE_POOL
 
 
-@dataclass
-class SourceConfig:
+# Task payloads cross Prefect task boundaries as plain dicts
+# (msgspec.structs.asdict); the Structs avoid dataclasses.asdict's recursive
+# deep copy on the way out.
+class SourceConfig(msgspec.Struct, frozen=True, dict=True):
     id: str
     name: str
     access_level: str
@@ -80,13 +167,12 @@ class SourceConfig:
     target_path: Optional[str]
     file_types: List[str]
 
-    @property
-    def allowed_extensions(self) -> List[str]:
-        return [ext.lower().lstrip(".") for ext in self.file_types if ext]
+    @cached_property
+    def allowed_extensions(self) -> FrozenSet[str]:
+        return frozenset(ext.lower().lstrip(".") for ext in self.file_types if ext)
 
 
-@dataclass
-class PendingFile:
+class PendingFile(msgspec.Struct):
     message_id: int
     file_id: str
     file_name: str
@@ -96,12 +182,36 @@ class PendingFile:
     message_text: Optional[str] = None  # For password extraction
 
 
+# Pending files cross from collect_new_files to process_files as columns (one
+# list per PendingFile field) instead of one dict per file; process_files
+# only turns the files it actually processes back into per-file dicts.
+PENDING_FILE_FIELDS = PendingFile.__struct_fields__
+
+
+def _pending_columns(files: List[PendingFile]) -> Dict[str, List[Any]]:
+    return {
+        field: [getattr(file, field) for file in files] for field in PENDING_FILE_FIELDS
+    }
+
+
+def _pending_rows(columns: Dict[str, List[Any]], limit: int) -> List[Dict[str, Any]]:
+    return [
+        dict(zip(PENDING_FILE_FIELDS, values))
+        for values in islice(zip(*(columns[f] for f in PENDING_FILE_FIELDS)), limit)
+    ]
+
+
+# Sessions of clients signed in with a bot token, keyed by (api_id, bot
+# token). Later clients in this worker resume the authorized auth key instead
+# of generating a new one and importing the bot authorization again.
+_BOT_SESSION_CACHE: Dict[Tuple[int, str], str] = {}
+
+
 def _build_client(config: SourceConfig) -> TelegramClient:
-    session = (
-        StringSession(config.session_string)
-        if config.session_string
-        else StringSession()
-    )
+    session_string = config.session_string
+    if not session_string and config.bot_token:
+        session_string = _BOT_SESSION_CACHE.get((config.api_id, config.bot_token))
+    session = StringSession(session_string) if session_string else StringSession()
     return TelegramClient(session, config.api_id, config.api_hash)
 
 
@@ -114,6 +224,7 @@ async def _ensure_client_ready(client: TelegramClient, config: SourceConfig):
             )
     elif config.bot_token:
         await client.start(bot_token=config.bot_token)
+        _BOT_SESSION_CACHE[(config.api_id, config.bot_token)] = client.session.save()
     else:
         await client.connect()
         if not await client.is_user_authorized():
@@ -122,7 +233,37 @@ async def _ensure_client_ready(client: TelegramClient, config: SourceConfig):
             )
 
 
-async def _resolve_entity(client: TelegramClient, identifier: str):
+@asynccontextmanager
+async def acquire_client(config: SourceConfig) -> AsyncIterator[TelegramClient]:
+    """Connected, authorized client for one task; disconnected on exit."""
+    client = _build_client(config)
+    try:
+        await _ensure_client_ready(client, config)
+        yield client
+    finally:
+        await client.disconnect()
+
+
+# Input peers of resolved channels, keyed by (api_id, session or bot token,
+# identifier). An input peer carries the access hash, so Telethon can use it
+# without another resolve round-trip in later tasks and runs of this worker.
+_ENTITY_CACHE: Dict[Tuple[int, str, str], Any] = {}
+
+
+async def _resolve_entity(client: TelegramClient, config: SourceConfig):
+    key = (
+        config.api_id,
+        config.session_string or config.bot_token or "",
+        config.identifier,
+    )
+    input_peer = _ENTITY_CACHE.get(key)
+    if input_peer is None:
+        entity = await _fetch_entity(client, config.identifier)
+        input_peer = _ENTITY_CACHE[key] = get_input_peer(entity)
+    return input_peer
+
+
+async def _fetch_entity(client: TelegramClient, identifier: str):
     try:
         if identifier.startswith("@"):
             return await client.get_entity(identifier)
@@ -133,17 +274,166 @@ async def _resolve_entity(client: TelegramClient, identifier: str):
         return await client.get_entity(identifier)
 
 
-def _normalized_processed_keys(keys: Sequence[Sequence[Any]]) -> Set[Tuple[int, str]]:
-    normalized: Set[Tuple[int, str]] = set()
-    for item in keys:
-        if len(item) != 2:
-            continue
-        message_id, file_id = item
+async def _download_in_parts(
+    client: TelegramClient,
+    message: Any,
+    destination: Path,
+    semaphore: asyncio.Semaphore,
+    hasher: Any,
+) -> Path:
+    """
+    Download a document as DOWNLOAD_PARALLEL_PARTS byte ranges requested
+    concurrently, each written in place into a preallocated file.
+
+    The hasher is fed the file in order while the ranges arrive: chunks at
+    the hashed prefix are hashed as they come in, and chunks that other
+    ranges wrote further ahead are read back (from the page cache) once the
+    prefix reaches them, so no full pass over the file is left at the end.
+
+    Like download_media, the extension of the document is appended to
+    destination.
+    """
+    size = message.file.size
+    path = destination.with_name(destination.name + (message.file.ext or ""))
+    total_parts = -(-size // DOWNLOAD_PART_SIZE)
+    parts_per_range = -(-total_parts // DOWNLOAD_PARALLEL_PARTS)
+    hashed = 0
+    # Offset -> length of chunks written beyond the hashed prefix
+    ahead: Dict[int, int] = {}
+
+    def hash_in_order(chunk: bytes, position: int):
+        nonlocal hashed
+        if position != hashed:
+            ahead[position] = len(chunk)
+            return
+        hasher.update(chunk)
+        hashed += len(chunk)
+        while hashed in ahead:
+            length = ahead.pop(hashed)
+            hasher.update(os.pread(fd, length, hashed))
+            hashed += length
+
+    async def fetch_range(first_part: int, part_count: int):
+        position = first_part * DOWNLOAD_PART_SIZE
+        async with semaphore:
+            async for chunk in client.iter_download(
+                message.document,
+                offset=position,
+                limit=part_count,
+                request_size=DOWNLOAD_PART_SIZE,
+                file_size=size,
+            ):
+                os.pwrite(fd, chunk, position)
+                hash_in_order(chunk, position)
+                position += len(chunk)
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        await asyncio.gather(
+            *(
+                fetch_range(first_part, min(parts_per_range, total_parts - first_part))
+                for first_part in range(0, total_parts, parts_per_range)
+            )
+        )
+    finally:
+        os.close(fd)
+    return path
+
+
+async def _download_streamed(
+    client: TelegramClient, message: Any, destination: Path, hasher: Optional[Any]
+) -> Path:
+    """
+    download_media into an open file (a DirectWriter, bypassing the page
+    cache, with DOWNLOAD_DIRECT_IO). A hasher is fed the chunks as they are
+    written. Writing and hashing run on a BackgroundWriter thread while the
+    next chunk downloads.
+    """
+    path = destination.with_name(destination.name + (message.file.ext or ""))
+    with DirectWriter(path) if DOWNLOAD_DIRECT_IO else path.open("wb") as sink:
+        writer = HashingWriter(sink, hasher) if hasher is not None else sink
+        with BackgroundWriter(writer) as background:
+            await client.download_media(message, file=background)
+            await background.drain()
+    return path
+
+
+async def _download_to_storage(
+    client: TelegramClient,
+    message: Any,
+    storage: StorageHandler,
+    relative_name: str,
+    hasher: Any,
+) -> Tuple[str, int]:
+    """
+    Stream a document from Telegram straight into storage, hashing it on
+    the way, without a temp file. The upload runs in a thread, draining a
+    bounded queue that the download fills.
+
+    Returns (storage_path, size in bytes).
+    """
+    reader = ChunkQueueReader(asyncio.get_running_loop())
+    hashing = HashingReader(reader, hasher)
+    upload = asyncio.ensure_future(
+        asyncio.to_thread(storage.store_fileobj, hashing, relative_name)
+    )
+
+    def upload_finished(task: asyncio.Future):
+        # Unblock the download if the upload stopped reading early
+        reader.fail()
+        if not task.cancelled():
+            task.exception()
+
+    upload.add_done_callback(upload_finished)
+    try:
+        async for chunk in client.iter_download(
+            message.document,
+            request_size=DOWNLOAD_PART_SIZE,
+            file_size=message.file.size,
+        ):
+            if upload.done():
+                break  # its error is raised below
+            await reader.put(chunk)
+        await reader.close()
+    except BaseException as exc:
+        reader.fail(exc)
+        raise
+    storage_path = await upload
+    return storage_path, hashing.bytes_read
+
+
+def _extension_allowed(config: SourceConfig, file_ext: str) -> bool:
+    """Whether processing would store a regular file with this extension."""
+    return not config.allowed_extensions or (
+        file_ext.lower().lstrip(".") in config.allowed_extensions
+    )
+
+
+@lru_cache(maxsize=256)
+def _safe_channel(channel_name: str) -> str:
+    """Channel name with the characters unsafe in file names removed."""
+    safe_channel = channel_name.replace(" ", "_").replace("/", "_").replace("\\", "_")
+    return "".join(c for c in safe_channel if c.isalnum() or c in ("_", "-"))
+
+
+def _structured_filename(
+    channel_name: str, message_id: int, timestamp: Optional[str], file_ext: str
+) -> str:
+    """Storage name of a downloaded file: {channel}_{msgid}_{timestamp}.ext"""
+    safe_channel = _safe_channel(channel_name)
+
+    # Format timestamp for filename (YYYYMMDDTHHmmss)
+    if timestamp:
         try:
-            normalized.add((int(message_id), str(file_id)))
-        except (TypeError, ValueError):  # pragma: no cover - defensive
-            continue
-    return normalized
+            dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+            timestamp_str = dt.strftime("%Y%m%dT%H%M%S")
+        except ValueError:
+            timestamp_str = "unknown"
+    else:
+        timestamp_str = "unknown"
+
+    return f"{safe_channel}_{message_id}_{timestamp_str}{file_ext}"
 
 
 def _safe_file_identifier(message: Any) -> Tuple[str, Optional[str]]:
@@ -157,15 +447,17 @@ def _safe_file_identifier(message: Any) -> Tuple[str, Optional[str]]:
     else:
         fallback_reason = None
 
-    for candidate in (
-        getattr(getattr(message, "file", None), "unique_id", None),
-        getattr(getattr(message, "document", None), "id", None),
-        getattr(getattr(getattr(message, "media", None), "document", None), "id", None),
-        getattr(getattr(message, "photo", None), "id", None),
-        getattr(getattr(getattr(message, "media", None), "photo", None), "id", None),
-    ):
-        if candidate:
-            return str(candidate), fallback_reason
+    # Each media type keeps its id in one known place
+    media = message.media
+    if isinstance(media, MessageMediaDocument):
+        candidate = media.document
+    elif isinstance(media, MessageMediaPhoto):
+        candidate = media.photo
+    else:
+        # Web page previews and chat photo changes
+        candidate = message.document or message.photo
+    if candidate is not None and candidate.id:
+        return str(candidate.id), fallback_reason
 
     dc_component = getattr(getattr(message, "file", None), "dc_id", None)
     return f"msg-{message.id}-{dc_component or 'unknown'}", fallback_reason
@@ -184,7 +476,20 @@ def _log_and_record(
         logger.warning(message)
     else:
         logger.info(message)
-    log_event(run_id=run_id, message=message, level=level, details=details)
+    _LOG_BUFFER.add(run_id, message, level, details)
+
+
+def _log_and_record_many(run_id: str, messages: List[str], level: LogLevel):
+    """Like _log_and_record for several messages."""
+    logger = get_run_logger()
+    for message in messages:
+        if level == LogLevel.ERROR:
+            logger.error(message)
+        elif level == LogLevel.WARNING:
+            logger.warning(message)
+        else:
+            logger.info(message)
+        _LOG_BUFFER.add(run_id, message, level)
 
 
 @task
@@ -202,23 +507,25 @@ def initialize_run(source_id: str) -> Dict[str, Any]:
             flow_run_id = getattr(task_run, "flow_run_id", None)
 
     with SessionLocal() as db:
-        source = db.query(Source).filter(Source.id == source_id).first()
+        # Load the linked session in the same query (LEFT OUTER JOIN)
+        source = (
+            db.query(Source)
+            .options(joinedload(Source.session))
+            .filter(Source.id == source_id)
+            .first()
+        )
         if not source:
             raise RuntimeError(f"Source {source_id} not found")
 
-        api_id = int(decrypt_data(source.api_id)) if source.api_id else None
-        api_hash = decrypt_data(source.api_hash) if source.api_hash else None
+        api_id = source.api_id
+        api_hash = decrypt_data(source.api_hash)
         bot_token = decrypt_data(source.bot_token) if source.bot_token else None
 
         session_string = None
         if source.access_level == AccessLevelEnum.PRIVATE:
             if not source.session_ref:
                 raise RuntimeError("Private source requires a linked Telegram session")
-            session = (
-                db.query(TelegramSession)
-                .filter(TelegramSession.id == source.session_ref)
-                .first()
-            )
+            session = source.session
             if not session:
                 raise RuntimeError("Linked Telegram session not found")
             session_string = decrypt_data(session.session_string)
@@ -250,200 +557,311 @@ def initialize_run(source_id: str) -> Dict[str, Any]:
 
     source_uuid = str(source.id)
     run = create_scrape_run(source_id=source_uuid, flow_run_id=flow_run_id)
-    processed = get_processed_file_keys(source_uuid)
+    # Telegram only returns messages newer than min_message_id (every older
+    # message was handled by a previous scan), so older keys are never needed
+    min_message_id = get_last_scanned_message_id(source_uuid) or 0
     processed_archives = get_processed_archive_checksums(source_uuid)
 
     _log_and_record(
         run_id=str(run.id),
-        message=f"Scrape run initialized. Found {len(processed)} processed files, {len(processed_archives)} processed archives",
+        message=f"Scrape run initialized. Found {len(processed_archives)} processed archives",
     )
 
     return {
         "run_id": str(run.id),
-        "config": asdict(config),
-        "processed_keys": [(msg_id, file_id) for msg_id, file_id in processed],
+        "config": msgspec.structs.asdict(config),
+        "min_message_id": min_message_id,
         "processed_archives": list(processed_archives),
     }
 
 
 @task
-def collect_new_files(initial_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+def collect_new_files(initial_data: Dict[str, Any]) -> Dict[str, List[Any]]:
     config = SourceConfig(**initial_data["config"])
-    processed_keys = _normalized_processed_keys(initial_data["processed_keys"])
     run_id = initial_data["run_id"]
 
     _log_and_record(run_id, "Scan started")
 
+    allowed_extensions = config.allowed_extensions
+    min_message_id = initial_data.get("min_message_id", 0)
+    skipped_processed = 0
+    last_scanned: Optional[int] = None
+    fallback_logs: List[Tuple[str, LogLevel, Optional[Dict[str, Any]]]] = []
+
     async def _collect() -> List[PendingFile]:
-        client = _build_client(config)
-        await _ensure_client_ready(client, config)
-        entity = await _resolve_entity(client, config.identifier)
-
-        new_files: List[PendingFile] = []
-        async for message in client.iter_messages(entity, limit=500):
-            if not message.file:
-                continue
-            file_id, fallback_reason = _safe_file_identifier(message)
-            if fallback_reason:
-                _log_and_record(
-                    run_id,
-                    (f"Using fallback identifier for message {message.id}: {file_id}"),
-                    LogLevel.DEBUG,
-                    details={"reason": fallback_reason},
-                )
-            key = (message.id, file_id)
-            if key in processed_keys:
-                _log_and_record(
-                    run_id,
-                    f"Skipping previously processed file from message {message.id}",
-                    LogLevel.DEBUG,
-                    details={"file_id": file_id},
-                )
-                continue
-
-            file_name = message.file.name or f"message_{message.id}"
-            lower_name = file_name.lower()
-            extension = next(
-                (
-                    suffix
-                    for suffix in ARCHIVE_MULTI_SUFFIXES
-                    if lower_name.endswith(suffix)
-                ),
-                None,
-            )
-            if not extension:
-                extension = (Path(file_name).suffix or message.file.ext or "").lower()
-            normalized_ext = extension.lstrip(".")
-
-            if (
-                config.allowed_extensions
-                and normalized_ext not in config.allowed_extensions
-                and not is_archive(file_name)
+        nonlocal last_scanned
+        async with acquire_client(config) as client:
+            entity = await _resolve_entity(client, config)
+
+            new_files: List[PendingFile] = []
+            async for message in client.iter_messages(
+                entity, limit=SCAN_MESSAGE_LIMIT, min_id=min_message_id
             ):
-                continue
-
-            # Capture message text for potential password extraction
-            message_text = message.message if hasattr(message, "message") else None
-
-            new_files.append(
-                PendingFile(
-                    message_id=message.id,
-                    file_id=file_id,
-                    file_name=file_name,
-                    file_extension=extension,
-                    size=message.file.size,
-                    date=message.date,
-                    message_text=message_text,
+                # Messages arrive newest first
+                if last_scanned is None:
+                    last_scanned = message.id
+                if not message.file:
+                    continue
+                file_id, fallback_reason = _safe_file_identifier(message)
+                if fallback_reason:
+                    fallback_logs.append(
+                        (
+                            f"Using fallback identifier for message {message.id}: {file_id}",
+                            LogLevel.DEBUG,
+                            {"reason": fallback_reason},
+                        )
+                    )
+                file_name = message.file.name or f"message_{message.id}"
+                extension = (
+                    archive_multi_suffix(file_name)
+                    or (file_suffix(file_name) or message.file.ext or "").lower()
+                )
+                normalized_ext = extension.lstrip(".")
+
+                if (
+                    allowed_extensions
+                    and normalized_ext not in allowed_extensions
+                    and not is_archive(file_name)
+                ):
+                    continue
+
+                # Capture message text for potential password extraction
+                message_text = message.message if hasattr(message, "message") else None
+
+                new_files.append(
+                    PendingFile(
+                        message_id=message.id,
+                        file_id=file_id,
+                        file_name=file_name,
+                        file_extension=extension,
+                        size=message.file.size,
+                        date=message.date,
+                        message_text=message_text,
+                    )
                 )
-            )
 
-        await client.disconnect()
         return new_files
 
     pending_files: List[PendingFile] = asyncio.run(_collect())
 
-    update_run_counts(run_id, files_found=len(pending_files))
+    # Files already processed are found with one query over the scanned keys
+    if pending_files:
+        processed_keys = get_processed_file_keys_in(
+            config.id, [(file.message_id, file.file_id) for file in pending_files]
+        )
+        if processed_keys:
+            pending_files = [
+                file
+                for file in pending_files
+                if (file.message_id, file.file_id) not in processed_keys
+            ]
+            skipped_processed += len(processed_keys)
+
+    # One query for files already stored from other messages, so reposts
+    # never reach download, checksum or upload
+    if SKIP_KNOWN_FILE_IDS and pending_files:
+        known_file_ids = get_recorded_file_ids(
+            config.id, {file.file_id for file in pending_files}
+        )
+        if known_file_ids:
+            before = len(pending_files)
+            pending_files = [
+                file for file in pending_files if file.file_id not in known_file_ids
+            ]
+            skipped_processed += before - len(pending_files)
+
+    # Per-message scan notes are queued after the scan, in one batch
+    for message, level, details in fallback_logs:
+        _LOG_BUFFER.add(run_id, message, level, details)
+    if skipped_processed:
+        _log_and_record(
+            run_id,
+            f"Skipped {skipped_processed} previously processed file(s)",
+            LogLevel.DEBUG,
+        )
+
+    # Everything below the oldest pending file has been handled; pending files
+    # stay inside the next scan until they are recorded as processed
+    if pending_files:
+        last_scanned = min(file.message_id for file in pending_files) - 1
+    update_run_counts(
+        run_id, files_found=len(pending_files), last_scanned_message_id=last_scanned
+    )
     if pending_files:
         _log_and_record(run_id, f"Found {len(pending_files)} new file(s) to process")
     else:
         _log_and_record(run_id, "No new files found")
 
-    return [asdict(file) for file in pending_files]
+    return _pending_columns(pending_files)
 
 
-@task(
-    name="download_files_sequential",
-    timeout_seconds=DOWNLOAD_TASK_BASE_TIMEOUT,
-    retries=2,
-    retry_delay_seconds=60,
-)
-async def download_files_sequential(
-    config_dict: Dict[str, Any],
+async def download_files_streaming(
+    config: SourceConfig,
     run_id: str,
     selected_files: List[Dict[str, Any]],
     temp_dir_path: str,
     processed_archives: Set[str],
-) -> List[Tuple[Dict[str, Any], Path]]:
+) -> AsyncIterator[Tuple[Dict[str, Any], Optional[Path]]]:
     """
-    Download all files SEQUENTIALLY using ONE Telethon client.
-    This avoids DC migration conflicts and AuthBytesInvalidError.
-    Returns list of (file_item, local_path) tuples for successful downloads.
+    Download all files using ONE Telethon client, up to DOWNLOAD_CONCURRENCY
+    at a time. A single client avoids DC migration conflicts and
+    AuthBytesInvalidError; concurrent requests on it are safe.
+    Yields (file_item, local_path) as each download succeeds, so the caller
+    can start processing a file while the others are downloading. With
+    STREAM_UPLOADS, regular documents are stored while they download and
+    yielded with local_path None and their storage_path in file_item.
     """
-    config = SourceConfig(**config_dict)
-    client = _build_client(config)
+    stream_storage = (
+        get_storage_handler(
+            target=TargetEnum(config.target),
+            source_id=config.id,
+            source_name=config.name,
+            run_id=run_id,
+            target_path=config.target_path,
+        )
+        if STREAM_UPLOADS
+        else None
+    )
+    part_semaphore = asyncio.Semaphore(MAX_INFLIGHT_PARTS)
+    file_semaphore = asyncio.Semaphore(max(DOWNLOAD_CONCURRENCY, 1))
 
-    try:
-        await _ensure_client_ready(client, config)
-        entity = await _resolve_entity(client, config.identifier)
+    async with acquire_client(config) as client:
+        entity = await _resolve_entity(client, config)
 
-        results = []
+        downloaded = 0
         total = len(selected_files)
 
         _log_and_record(
             run_id,
-            f"Starting sequential download of {total} files with ONE Telethon client...",
+            f"Starting download of {total} files ({DOWNLOAD_CONCURRENCY} at a time) with ONE Telethon client...",
         )
 
-        for idx, file_item in enumerate(selected_files, 1):
-            message_id = file_item["message_id"]
-            file_id = file_item["file_id"]
-            file_name = file_item["file_name"]
+        async def download_one(
+            idx: int, file_item: Dict[str, Any]
+        ) -> Optional[Tuple[Dict[str, Any], Optional[Path]]]:
+            async with file_semaphore:
+                message_id = file_item["message_id"]
+                file_id = file_item["file_id"]
+                file_name = file_item["file_name"]
 
-            _log_and_record(
-                run_id,
-                f"[Download {idx}/{total}] Starting message {message_id}: {file_name}",
-            )
+                _log_and_record(
+                    run_id,
+                    f"[Download {idx}/{total}] Starting message {message_id}: {file_name}",
+                )
 
-            # Download with retry logic
-            attempt = 0
-            delay = DOWNLOAD_RETRY_BASE_DELAY
-            local_path = None
+                # Download with retry logic
+                attempt = 0
+                flood_waits = 0
+                delay = DOWNLOAD_RETRY_BASE_DELAY
+                local_path = None
 
-            while attempt < DOWNLOAD_RETRY_ATTEMPTS:
-                try:
-                    message = await client.get_messages(entity, ids=message_id)
-                    if not message or not message.file:
-                        _log_and_record(
-                            run_id,
-                            f"[Download {idx}/{total}] Skipping: no file attachment",
-                            LogLevel.WARNING,
+                while attempt < DOWNLOAD_RETRY_ATTEMPTS:
+                    try:
+                        message = await client.get_messages(entity, ids=message_id)
+                        if not message or not message.file:
+                            _log_and_record(
+                                run_id,
+                                f"[Download {idx}/{total}] Skipping: no file attachment",
+                                LogLevel.WARNING,
+                            )
+                            break
+
+                        # Extract metadata from message for later use
+                        file_item["timestamp"] = (
+                            message.date.isoformat() if message.date else None
+                        )
+                        file_item["message_text"] = (
+                            message.message if hasattr(message, "message") else None
+                        )
+                        file_item["channel_name"] = config.name
+
+                        destination = Path(temp_dir_path) / f"{message_id}_{file_id}"
+
+                        # Files are hashed as they are downloaded instead of
+                        # being read back afterwards: archives with SHA-256 for
+                        # duplicate detection, other files with the stored-file
+                        # checksum
+                        archive = is_archive(file_name)
+                        file_ext = message.file.ext or ""
+                        streamed = False
+                        hasher = (
+                            hashlib.sha256()
+                            if archive
+                            else new_hasher(FILE_CHECKSUM_ALGORITHM)
                         )
-                        break
 
-                    # Extract metadata from message for later use
-                    file_item["timestamp"] = (
-                        message.date.isoformat() if message.date else None
-                    )
-                    file_item["message_text"] = (
-                        message.message if hasattr(message, "message") else None
-                    )
-                    file_item["channel_name"] = config.name
+                        # Large documents are fetched as parallel byte ranges
+                        if (
+                            DOWNLOAD_PARALLEL_PARTS > 1
+                            and message.document
+                            and (message.file.size or 0) >= DOWNLOAD_PARALLEL_MIN_SIZE
+                        ):
+                            download = _download_in_parts(
+                                client, message, destination, part_semaphore, hasher
+                            )
+                        else:
+                            if (
+                                stream_storage is not None
+                                and message.document
+                                and not archive
+                                and _extension_allowed(config, file_ext)
+                            ):
+                                # Straight to storage, no temp file
+                                streamed = True
+                                download = _download_to_storage(
+                                    client,
+                                    message,
+                                    stream_storage,
+                                    _structured_filename(
+                                        config.name,
+                                        message_id,
+                                        file_item["timestamp"],
+                                        file_ext,
+                                    ),
+                                    hasher,
+                                )
+                            else:
+                                download = _download_streamed(
+                                    client, message, destination, hasher
+                                )
+
+                        # Add per-file timeout to prevent hanging on large files
+                        download_result = await asyncio.wait_for(
+                            download,
+                            timeout=DOWNLOAD_TIMEOUT_PER_FILE,  # 30 min per file
+                        )
 
-                    destination = Path(temp_dir_path) / f"{message_id}_{file_id}"
+                        file_item["download_date"] = datetime.now(
+                            timezone.utc
+                        ).isoformat()
 
-                    # Add per-file timeout to prevent hanging on large files
-                    download_path = await asyncio.wait_for(
-                        client.download_media(message, file=str(destination)),
-                        timeout=DOWNLOAD_TIMEOUT_PER_FILE,  # 30 min per file
-                    )
-                    local_path = Path(download_path)
+                        if streamed:
+                            storage_path, size_bytes = download_result
+                            file_item["storage_path"] = storage_path
+                            file_item["size_bytes"] = size_bytes
+                            file_item["checksum"] = hasher.hexdigest()
+                            file_item["local_name"] = destination.name + file_ext
+                            _log_and_record(
+                                run_id,
+                                f"[Download {idx}/{total}] ✓ Downloaded to storage: {file_item['local_name']} ({size_bytes / 1024 / 1024:.1f} MB)",
+                            )
+                            return file_item, None
 
-                    size_mb = local_path.stat().st_size / 1024 / 1024
+                        local_path = Path(download_result)
 
-                    # Calculate archive checksum if it's an archive file
-                    archive_checksum = None
-                    if is_archive(file_name):
-                        _log_and_record(
-                            run_id,
-                            f"[Download {idx}/{total}] Calculating archive checksum...",
-                            LogLevel.DEBUG,
-                        )
-                        archive_checksum = await asyncio.to_thread(
-                            sha256_checksum, local_path
-                        )
+                        # Stat once here; processing reuses the size
+                        file_item["size_bytes"] = local_path.stat().st_size
+                        size_mb = file_item["size_bytes"] / 1024 / 1024
+
+                        # Every download path hashed the file as it arrived
+                        archive_checksum = None
+                        if archive:
+                            archive_checksum = hasher.hexdigest()
+                        else:
+                            file_item["checksum"] = hasher.hexdigest()
 
                         # Check if this archive was already processed
-                        if archive_checksum in processed_archives:
+                        if archive_checksum and archive_checksum in processed_archives:
                             _log_and_record(
                                 run_id,
                                 f"[Download {idx}/{total}] ⚠️ Archive already processed (checksum: {archive_checksum[:16]}...)",
@@ -456,75 +874,110 @@ async def download_files_sequential(
                             )
                             break  # Skip this archive
 
-                    _log_and_record(
-                        run_id,
-                        f"[Download {idx}/{total}] ✓ Downloaded: {local_path.name} ({size_mb:.1f} MB)",
-                    )
+                        _log_and_record(
+                            run_id,
+                            f"[Download {idx}/{total}] ✓ Downloaded: {local_path.name} ({size_mb:.1f} MB)",
+                        )
 
-                    # Store checksum in file_item for later use
-                    file_item["archive_checksum"] = archive_checksum
+                        # Store checksum in file_item for later use
+                        file_item["archive_checksum"] = archive_checksum
 
-                    results.append((file_item, local_path))
-                    break
+                        return file_item, local_path
 
-                except (TelethonTimeoutError, asyncio.TimeoutError) as exc:
-                    attempt += 1
-                    _log_and_record(
-                        run_id,
-                        f"[Download {idx}/{total}] Timeout (attempt {attempt}/{DOWNLOAD_RETRY_ATTEMPTS}): {exc}",
-                        LogLevel.WARNING,
-                    )
-                    if attempt < DOWNLOAD_RETRY_ATTEMPTS:
-                        await asyncio.sleep(delay)
-                        delay *= 2
-                    else:
+                    except FloodWaitError as exc:
+                        # Telegram says exactly how long to back off; waiting it
+                        # out doesn't count as a failed attempt
+                        flood_waits += 1
+                        if (
+                            flood_waits > MAX_FLOOD_WAITS
+                            or exc.seconds > MAX_FLOOD_WAIT_SECONDS
+                        ):
+                            _log_and_record(
+                                run_id,
+                                f"[Download {idx}/{total}] ✗ Rate limited for {exc.seconds}s, leaving file for the next run",
+                                LogLevel.ERROR,
+                            )
+                            break
+                        _log_and_record(
+                            run_id,
+                            f"[Download {idx}/{total}] Rate limited, waiting {exc.seconds}s",
+                            LogLevel.WARNING,
+                        )
+                        await asyncio.sleep(exc.seconds + random.uniform(0, 1))
+
+                    except (TelethonTimeoutError, asyncio.TimeoutError) as exc:
+                        attempt += 1
                         _log_and_record(
                             run_id,
-                            f"[Download {idx}/{total}] ✗ Failed after {DOWNLOAD_RETRY_ATTEMPTS} attempts",
+                            f"[Download {idx}/{total}] Timeout (attempt {attempt}/{DOWNLOAD_RETRY_ATTEMPTS}): {exc}",
+                            LogLevel.WARNING,
+                        )
+                        if attempt < DOWNLOAD_RETRY_ATTEMPTS:
+                            # Decorrelated jitter keeps workers from retrying in step
+                            delay = min(
+                                MAX_RETRY_DELAY,
+                                random.uniform(DOWNLOAD_RETRY_BASE_DELAY, delay * 3),
+                            )
+                            await asyncio.sleep(delay)
+                        else:
+                            _log_and_record(
+                                run_id,
+                                f"[Download {idx}/{total}] ✗ Failed after {DOWNLOAD_RETRY_ATTEMPTS} attempts",
+                                LogLevel.ERROR,
+                            )
+                            break
+
+                    except Exception as exc:
+                        _log_and_record(
+                            run_id,
+                            f"[Download {idx}/{total}] ✗ Error: {exc}",
                             LogLevel.ERROR,
                         )
                         break
 
-                except Exception as exc:
-                    _log_and_record(
-                        run_id,
-                        f"[Download {idx}/{total}] ✗ Error: {exc}",
-                        LogLevel.ERROR,
-                    )
-                    break
+            return None
+
+        # Files download concurrently on the one client; each is handed to
+        # the caller as soon as it is complete
+        downloads = [
+            asyncio.ensure_future(download_one(idx, file_item))
+            for idx, file_item in enumerate(selected_files, 1)
+        ]
+        try:
+            for completed in asyncio.as_completed(downloads):
+                outcome = await completed
+                if outcome is not None:
+                    downloaded += 1
+                    yield outcome
+        finally:
+            for download in downloads:
+                download.cancel()
+            await asyncio.gather(*downloads, return_exceptions=True)
 
         _log_and_record(
             run_id,
-            f"Download phase complete: {len(results)}/{total} files downloaded successfully",
+            f"Download phase complete: {downloaded}/{total} files downloaded successfully",
         )
 
-        return results
-
-    finally:
-        await client.disconnect()
-
 
-@task(
-    retries=2,
-    retry_delay_seconds=60,
-    timeout_seconds=PROCESS_FILE_TIMEOUT,
-    name="process_downloaded_file",
-)
 async def process_downloaded_file(
-    config_dict: Dict[str, Any],
+    config: SourceConfig,
     run_id: str,
     file_item: Dict[str, Any],
-    local_path: Path,
+    local_path: Optional[Path],
     temp_dir_path: str,
     file_index: int,
     total_files: int,
+    hash_semaphore: Optional[asyncio.Semaphore] = None,
+    store_semaphore: Optional[asyncio.Semaphore] = None,
 ) -> Dict[str, Any]:
     """
     Process an already-downloaded file: extract, store, checksum, and record.
     No Telethon client needed - can run in parallel safely.
-    This task provides granular visibility and automatic retries per file.
+    Runs inside the orchestrator task; see _process_file for retries.
+    Archive extraction waits on hash_semaphore and storing a regular file
+    on store_semaphore, so CPU- and network-bound work are limited apart.
     """
-    config = SourceConfig(**config_dict)
     message_id = file_item["message_id"]
     file_id = file_item["file_id"]
     file_name = file_item["file_name"]
@@ -537,31 +990,40 @@ async def process_downloaded_file(
 
     try:
         # Get storage handler
-        storage = get_storage_handler(
+        storage_options = dict(
             target=TargetEnum(config.target),
             source_id=config.id,
             source_name=config.name,
             run_id=run_id,
             target_path=config.target_path,
         )
+        storage = get_storage_handler(**storage_options)
 
         stored_count = 0
-        extension = local_path.suffix.lower()
+        record = None
+        # Files streamed to storage during the download have no local copy
+        streamed_path = file_item.get("storage_path")
+        local_name = local_path.name if local_path else file_item["local_name"]
+        extension = file_suffix(local_name).lower()
+        # Size recorded at download time; stat only if it was not passed on
+        size_bytes = (
+            file_item["size_bytes"]
+            if file_item.get("size_bytes") is not None
+            else local_path.stat().st_size
+        )
+        download_date = (
+            file_item.get("download_date") or datetime.now(timezone.utc).isoformat()
+        )
 
-        # Process based on file type
-        if is_archive(local_path.name):
+        # Process based on file type; streamed files are never archives, so
+        # only this branch needs the local copy
+        if is_archive(local_name):
             _log_and_record(
                 run_id,
                 f"[Process {file_index}/{total_files}] Extracting archive: {local_path.name}",
             )
 
-            # Use original file name (without extension) for extraction directory
-            archive_name_without_ext = local_path.stem
-            # Handle multi-part extensions like .tar.gz
-            for multi_suffix in ARCHIVE_MULTI_SUFFIXES:
-                if local_path.name.lower().endswith(multi_suffix):
-                    archive_name_without_ext = local_path.name[: -len(multi_suffix)]
-                    break
+            extraction_dir = f"{archive_stem(local_path.name)}_extracted"
 
             # Extract potential passwords from message text
             passwords = []
@@ -576,20 +1038,14 @@ async def process_downloaded_file(
                     )
 
             # Calculate archive size for metadata
-            archive_size_mb = local_path.stat().st_size / 1024 / 1024
+            archive_size_mb = size_bytes / 1024 / 1024
             password_protected = False
 
             try:
-                # Use recursive extraction - it will create the extraction directory
-                extracted_paths = await asyncio.to_thread(
-                    extract_archive_recursive,
-                    local_path,
-                    Path(temp_dir_path),
-                    passwords,
-                )
-                _log_and_record(
-                    run_id,
-                    f"[Process {file_index}/{total_files}] Extracted {len(extracted_paths)} file(s) (including nested archives)",
+                # Opens the archive and checks passwords; members are read
+                # straight from it while storing below
+                members = await asyncio.to_thread(
+                    extract_archive_stream, local_path, passwords
                 )
             except RuntimeError as exc:
                 # Handle password-protected archives specifically
@@ -643,59 +1099,37 @@ async def process_downloaded_file(
                     "message_id": message_id,
                 }
 
-            allowed = filter_allowed_files(
-                extracted_paths, config.file_types or ["txt"]
-            )
-
-            if not allowed:
-                _log_and_record(
-                    run_id,
-                    f"[Process {file_index}/{total_files}] No allowed files in archive",
-                    LogLevel.INFO,
-                )
-                return {
-                    "success": True,
-                    "stored": 0,
-                    "message_id": message_id,
-                    "reason": "no_allowed_files",
-                }
-
-            _log_and_record(
-                run_id,
-                f"[Process {file_index}/{total_files}] Storing {len(allowed)} extracted file(s)...",
-            )
-
-            # The extraction directory is: temp_dir_path/archive_name_extracted/
-            extraction_base_dir = (
-                Path(temp_dir_path) / f"{archive_name_without_ext}_extracted"
-            )
-
-            for extracted_file in allowed:
-                # Preserve folder structure from archive (including nested archives)
-                try:
-                    # Get path relative to temp directory to preserve full structure
-                    relative_path = extracted_file.relative_to(Path(temp_dir_path))
-                    # Use the relative path directly (it already includes archive_name_extracted/)
-                    structured_name = str(relative_path)
-                except ValueError:
-                    # Fallback if relative_to fails
-                    structured_name = (
-                        f"{archive_name_without_ext}_extracted/{extracted_file.name}"
+            allowed_extensions = config.allowed_extensions or frozenset({"txt"})
+            if ARCHIVE_PROCESS_WORKERS > 0:
+                # The archive was opened above only to check it; the worker
+                # process reopens it
+                members.close()
+                loop = asyncio.get_running_loop()
+                async with hash_semaphore or nullcontext():
+                    extracted_count, stored_members = await loop.run_in_executor(
+                        _archive_pool(),
+                        store_archive_in_process,
+                        storage_options,
+                        str(local_path),
+                        passwords,
+                        allowed_extensions,
+                    )
+            else:
+                async with hash_semaphore or nullcontext():
+                    extracted_count, stored_members = await asyncio.to_thread(
+                        store_archive_members,
+                        storage,
+                        members,
+                        allowed_file_filter(allowed_extensions),
                     )
 
-                storage_path = await asyncio.to_thread(
-                    storage.store_file, str(extracted_file), structured_name
-                )
-                checksum = await asyncio.to_thread(sha256_checksum, extracted_file)
-
-                # Get archive checksum from file_item
-                archive_checksum = file_item.get("archive_checksum")
+            # Rows are inserted in one batch once every extracted file is stored
+            archive_checksum = file_item.get("archive_checksum")
+            file_rows: List[Dict[str, Any]] = []
+            for structured_name, storage_path, checksum, size in stored_members:
+                member_name = PurePosixPath(structured_name)
 
-                # Determine relative path within extraction directory
-                try:
-                    rel_path_str = str(extracted_file.relative_to(extraction_base_dir))
-                except ValueError:
-                    rel_path_str = extracted_file.name
+                relative_path = str(member_name.relative_to(extraction_dir))
 
                 # Build comprehensive archive metadata
                 archive_metadata = {
@@ -703,53 +1137,73 @@ async def process_downloaded_file(
                     "archive_name": local_path.name,
                     "archive_size_mb": round(archive_size_mb, 2),
                     "archive_checksum": archive_checksum,
+                    "checksum_algo": FILE_CHECKSUM_ALGORITHM,
                     "password_protected": password_protected,
-                    "relative_path": rel_path_str,
-                    "extraction_dir": f"{archive_name_without_ext}_extracted",
+                    "relative_path": relative_path,
+                    "extraction_dir": extraction_dir,
                     # Enhanced metadata
                     "channel_name": file_item.get("channel_name", config.name),
                     "message_id": message_id,
                     "file_id": file_id,
                     "timestamp": file_item.get("timestamp"),
                     "message_text": file_item.get("message_text"),
-                    "download_date": datetime.now(timezone.utc).isoformat(),
+                    "download_date": download_date,
                 }
 
                 # Add password info if applicable
                 if passwords:
                     archive_metadata["passwords_found"] = len(passwords)
 
-                file_record = await asyncio.to_thread(
-                    record_scraped_file,
-                    run_id=run_id,
-                    source_id=config.id,
-                    message_id=message_id,
-                    file_id=file_id,
-                    file_name=extracted_file.name,
-                    storage_path=storage_path,
-                    file_extension=extracted_file.suffix.lower(),
-                    size_bytes=extracted_file.stat().st_size,
-                    checksum=checksum,
-                    extracted_from=local_path.name,
-                    extra_metadata=archive_metadata,
-                    archive_checksum=archive_checksum,
+                file_rows.append(
+                    {
+                        "run_id": run_id,
+                        "source_id": config.id,
+                        "message_id": message_id,
+                        "file_id": file_id,
+                        "file_name": member_name.name,
+                        "storage_path": storage_path,
+                        "file_extension": member_name.suffix.lower(),
+                        "size_bytes": size,
+                        "checksum": checksum,
+                        "extracted_from": local_path.name,
+                        "member_path": relative_path,
+                        "extra_metadata": archive_metadata,
+                        "archive_checksum": archive_checksum,
+                    }
                 )
 
-                if file_record:
-                    stored_count += 1
-                    _log_and_record(
-                        run_id,
-                        f"[Process {file_index}/{total_files}] Stored: {structured_name}",
-                        LogLevel.DEBUG,
-                    )
+            _log_and_record(
+                run_id,
+                f"[Process {file_index}/{total_files}] Extracted {extracted_count} file(s) (including nested archives)",
+            )
+
+            if not file_rows:
+                _log_and_record(
+                    run_id,
+                    f"[Process {file_index}/{total_files}] No allowed files in archive",
+                    LogLevel.INFO,
+                )
+                return {
+                    "success": True,
+                    "stored": 0,
+                    "message_id": message_id,
+                    "reason": "no_allowed_files",
+                }
+
+            stored_count = await asyncio.to_thread(record_scraped_files, file_rows)
+            if stored_count:
+                _log_and_record_many(
+                    run_id,
+                    [
+                        f"[Process {file_index}/{total_files}] Stored: {member[0]}"
+                        for member in stored_members
+                    ],
+                    LogLevel.DEBUG,
+                )
 
         else:
             # Regular file processing
-            normalized_ext = extension.lstrip(".")
-            if (
-                config.allowed_extensions
-                and normalized_ext not in config.allowed_extensions
-            ):
+            if not _extension_allowed(config, extension):
                 _log_and_record(
                     run_id,
                     f"[Process {file_index}/{total_files}] Skipping: extension {extension} not allowed",
@@ -764,48 +1218,36 @@ async def process_downloaded_file(
 
             _log_and_record(
                 run_id,
-                f"[Process {file_index}/{total_files}] Storing file: {local_path.name}",
+                f"[Process {file_index}/{total_files}] Storing file: {local_name}",
             )
 
-            # Calculate checksum
-            checksum = await asyncio.to_thread(sha256_checksum, local_path)
-
             # Get metadata from file_item
             channel_name = file_item.get("channel_name", config.name)
             timestamp = file_item.get("timestamp")
 
-            # Sanitize channel name for filename (remove special chars)
-            safe_channel = (
-                channel_name.replace(" ", "_").replace("/", "_").replace("\\", "_")
-            )
-            safe_channel = "".join(
-                c for c in safe_channel if c.isalnum() or c in ("_", "-")
-            )
-
-            # Format timestamp for filename (YYYYMMDDTHHmmss)
-            if timestamp:
-                # Parse ISO timestamp and format it
-                from datetime import datetime
-
-                try:
-                    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
-                    timestamp_str = dt.strftime("%Y%m%dT%H%M%S")
-                except:
-                    timestamp_str = "unknown"
-            else:
-                timestamp_str = "unknown"
-
-            # Get file extension
-            file_ext = local_path.suffix  # .txt, .pdf, etc.
-
             # Create filename: {channel}_{msgid}_{timestamp}.ext
-            structured_filename = (
-                f"{safe_channel}_{message_id}_{timestamp_str}{file_ext}"
+            structured_filename = _structured_filename(
+                channel_name, message_id, timestamp, file_suffix(local_name)
             )
 
-            storage_path = await asyncio.to_thread(
-                storage.store_file, str(local_path), structured_filename
-            )
+            checksum = file_item.get("checksum")
+            if streamed_path:
+                # Uploaded and hashed while downloading
+                storage_path = streamed_path
+            elif checksum:
+                # Hashed while downloading; a plain copy is enough
+                async with store_semaphore or nullcontext():
+                    storage_path = await asyncio.to_thread(
+                        storage.store_file, str(local_path), structured_filename
+                    )
+            else:
+                # Store and checksum in one read of the file
+                async with store_semaphore or nullcontext():
+                    storage_path, checksum = await asyncio.to_thread(
+                        storage.store_file_with_checksum,
+                        str(local_path),
+                        structured_filename,
+                    )
 
             # Build metadata
             extra_metadata = {
@@ -814,30 +1256,42 @@ async def process_downloaded_file(
                 "file_id": file_id,
                 "timestamp": timestamp,
                 "message_text": file_item.get("message_text"),
-                "download_date": datetime.now(timezone.utc).isoformat(),
+                "download_date": download_date,
                 "original_filename": file_name,
+                "checksum_algo": FILE_CHECKSUM_ALGORITHM,
             }
 
-            file_record = await asyncio.to_thread(
-                record_scraped_file,
+            file_row = dict(
                 run_id=run_id,
                 source_id=config.id,
                 message_id=message_id,
                 file_id=file_id,
-                file_name=local_path.name,
+                file_name=local_name,
                 storage_path=storage_path,
                 file_extension=extension,
-                size_bytes=local_path.stat().st_size,
+                size_bytes=size_bytes,
                 checksum=checksum,
                 extra_metadata=extra_metadata,
             )
 
-            if file_record:
-                stored_count = 1
+            if SCRAPED_FILE_BATCH_SIZE > 0:
+                # The orchestrator inserts the row with the rest of its batch
+                record = file_row
+            else:
+                file_record = await asyncio.to_thread(record_scraped_file, **file_row)
+                if file_record:
+                    stored_count = 1
 
         _log_and_record(
             run_id,
-            f"[Process {file_index}/{total_files}] ✓ Completed: stored {stored_count} file(s)",
+            (
+                f"[Process {file_index}/{total_files}] ✓ Completed: "
+                + (
+                    "stored 1 file (record queued)"
+                    if record
+                    else f"stored {stored_count} file(s)"
+                )
+            ),
             LogLevel.INFO,
         )
 
@@ -846,6 +1300,7 @@ async def process_downloaded_file(
             "message_id": message_id,
             "stored": stored_count,
             "processed": 1,
+            "record": record,
         }
 
     except Exception as exc:
@@ -858,28 +1313,96 @@ async def process_downloaded_file(
         raise
 
 
+def _temp_root(run_id: str, estimated_total_mb: float) -> Optional[str]:
+    """
+    DOWNLOADER_TEMP_ROOT when the run's estimated downloads fit in its free
+    space, else None (the system temp dir).
+    """
+    if not DOWNLOADER_TEMP_ROOT:
+        return None
+    try:
+        free_mb = shutil.disk_usage(DOWNLOADER_TEMP_ROOT).free / 1024 / 1024
+    except OSError as exc:
+        _log_and_record(
+            run_id,
+            f"DOWNLOADER_TEMP_ROOT {DOWNLOADER_TEMP_ROOT} unusable ({exc}), using system temp dir",
+            LogLevel.WARNING,
+        )
+        return None
+    if estimated_total_mb > free_mb:
+        _log_and_record(
+            run_id,
+            (
+                f"Estimated {estimated_total_mb:.1f} MB exceeds {free_mb:.1f} MB free in "
+                f"{DOWNLOADER_TEMP_ROOT}, using system temp dir"
+            ),
+            LogLevel.WARNING,
+        )
+        return None
+    return DOWNLOADER_TEMP_ROOT
+
+
+async def _process_file(
+    semaphore: asyncio.Semaphore,
+    idx: int,
+    file_item: Dict[str, Any],
+    **kwargs: Any,
+) -> Tuple[int, Dict[str, Any], Any]:
+    """
+    process_downloaded_file under the PROCESS_CONCURRENCY semaphore, with
+    PROCESS_FILE_TIMEOUT per attempt and PROCESS_FILE_RETRIES retries.
+    The semaphore is held per attempt only, so a file waiting to retry does
+    not keep other files from being processed.
+    The final failure is returned rather than raised.
+    """
+    run_id = kwargs["run_id"]
+    for attempt in range(PROCESS_FILE_RETRIES + 1):
+        try:
+            async with semaphore:
+                result = await asyncio.wait_for(
+                    process_downloaded_file(
+                        file_item=file_item, file_index=idx, **kwargs
+                    ),
+                    timeout=PROCESS_FILE_TIMEOUT,
+                )
+            return idx, file_item, result
+        except Exception as exc:
+            if attempt == PROCESS_FILE_RETRIES:
+                return idx, file_item, exc
+            _log_and_record(
+                run_id,
+                f"[Process {idx}] Retrying in {PROCESS_FILE_RETRY_DELAY}s "
+                f"(attempt {attempt + 1}/{PROCESS_FILE_RETRIES + 1} failed: {exc!r})",
+                LogLevel.WARNING,
+            )
+            await asyncio.sleep(PROCESS_FILE_RETRY_DELAY)
+
+
 @task(name="process_files_orchestrator")
 async def process_files(
-    initial_data: Dict[str, Any], pending_files: List[Dict[str, Any]]
+    initial_data: Dict[str, Any], pending_files: Dict[str, List[Any]]
 ) -> Dict[str, Any]:
     """
-    Orchestrate file processing using two-phase approach:
-    Phase 1: Download all files SEQUENTIALLY with ONE Telethon client (avoids session conflicts)
-    Phase 2: Process files IN PARALLEL (extract, upload, checksum, DB recording)
+    Orchestrate file processing as a pipeline:
+    Downloads share ONE Telethon client (avoids session conflicts), up to
+    DOWNLOAD_CONCURRENCY at a time
+    Each downloaded file is processed IN PARALLEL (extract, upload, checksum, DB
+    recording) while the others are still downloading
     """
-    if not pending_files:
+    pending_count = len(pending_files["message_id"])
+    if not pending_count:
         return {"processed": 0, "stored": 0, "messages": 0}
 
     config = SourceConfig(**initial_data["config"])
     run_id = initial_data["run_id"]
 
-    selected_files = pending_files[:MAX_FILES_PER_RUN]
-    if len(pending_files) > MAX_FILES_PER_RUN:
+    selected_files = _pending_rows(pending_files, MAX_FILES_PER_RUN)
+    if pending_count > MAX_FILES_PER_RUN:
         _log_and_record(
             run_id,
             (
                 f"Limiting run to first {MAX_FILES_PER_RUN} files out of "
-                f"{len(pending_files)} pending for debugging"
+                f"{pending_count} pending for debugging"
             ),
             LogLevel.WARNING,
         )
@@ -887,8 +1410,8 @@ async def process_files(
     total_planned = len(selected_files)
 
     # Estimate total sizes for better timeout planning
-    estimated_total_mb = sum(
-        (file.get("size", 0) or 0) / 1024 / 1024 for file in selected_files
+    estimated_total_mb = (
+        sum(size or 0 for size in pending_files["size"][:total_planned]) / 1024 / 1024
     )
 
     _log_and_record(
@@ -897,37 +1420,66 @@ async def process_files(
     )
 
     # Create shared temp directory
-    temp_dir = tempfile.TemporaryDirectory()
+    temp_dir = tempfile.TemporaryDirectory(dir=_temp_root(run_id, estimated_total_mb))
+    futures = []
 
     try:
-        # ===== PHASE 1: Sequential Download (ONE Telethon client) =====
+        # ===== Concurrent download (ONE Telethon client) feeding =====
+        # ===== parallel post-processing (NO Telethon clients)     =====
         _log_and_record(
             run_id,
-            f"Phase 1: Downloading {total_planned} files sequentially (avoids session conflicts)...",
+            f"Downloading {total_planned} files with one client (avoids session conflicts), "
+            f"processing each in parallel as it completes...",
         )
 
-        try:
-            # Call the download function directly (as a coroutine, not as a Prefect task)
-            # since we're already inside a Prefect task
-            processed_archives = set(initial_data.get("processed_archives", []))
+        processed_archives = set(initial_data.get("processed_archives", []))
 
-            download_results = await download_files_sequential.fn(
-                config_dict=initial_data["config"],
-                run_id=run_id,
-                selected_files=selected_files,
-                temp_dir_path=temp_dir.name,
-                processed_archives=processed_archives,
-            )
+        # Process each downloaded file in this task, PROCESS_CONCURRENCY at a
+        # time, instead of paying for a Prefect task run per file
+        process_semaphore = asyncio.Semaphore(max(PROCESS_CONCURRENCY, 1))
+        hash_semaphore = asyncio.Semaphore(max(HASH_CONCURRENCY, 1))
+        store_semaphore = asyncio.Semaphore(max(STORE_CONCURRENCY, 1))
+        try:
+            # Bounds the whole download phase; per-file timeouts are handled
+            # in download_one
+            async with asyncio.timeout(DOWNLOAD_TASK_BASE_TIMEOUT):
+                # aclosing disconnects the client even if submitting fails
+                async with aclosing(
+                    download_files_streaming(
+                        config=config,
+                        run_id=run_id,
+                        selected_files=selected_files,
+                        temp_dir_path=temp_dir.name,
+                        processed_archives=processed_archives,
+                    )
+                ) as downloads:
+                    async for file_item, local_path in downloads:
+                        idx = len(futures) + 1
+                        future = asyncio.ensure_future(
+                            _process_file(
+                                process_semaphore,
+                                idx,
+                                file_item,
+                                config=config,
+                                run_id=run_id,
+                                local_path=local_path,
+                                temp_dir_path=temp_dir.name,
+                                total_files=total_planned,
+                                hash_semaphore=hash_semaphore,
+                                store_semaphore=store_semaphore,
+                            )
+                        )
+                        futures.append(future)
         except asyncio.TimeoutError:
+            # Files already submitted are still awaited below
             _log_and_record(
                 run_id,
                 f"Download phase timed out after {DOWNLOAD_TASK_BASE_TIMEOUT}s. "
                 f"Consider increasing DOWNLOAD_TASK_BASE_TIMEOUT or reducing MAX_FILES_PER_RUN.",
                 LogLevel.ERROR,
             )
-            return {"processed": 0, "stored": 0, "messages": 0}
 
-        if not download_results:
+        if not futures:
             _log_and_record(
                 run_id,
                 "No files downloaded successfully. Skipping processing phase.",
@@ -935,46 +1487,74 @@ async def process_files(
             )
             return {"processed": 0, "stored": 0, "messages": 0}
 
-        # ===== PHASE 2: Parallel Post-Processing (NO Telethon clients) =====
         _log_and_record(
             run_id,
-            f"Phase 2: Processing {len(download_results)} downloaded files in parallel...",
+            f"Waiting for {len(futures)} processing tasks to complete...",
         )
 
-        # Submit all downloaded files as separate Prefect tasks
-        futures = []
-        for idx, (file_item, local_path) in enumerate(download_results, 1):
-            future = process_downloaded_file.submit(
-                config_dict=initial_data["config"],
-                run_id=run_id,
-                file_item=file_item,
-                local_path=local_path,
-                temp_dir_path=temp_dir.name,
-                file_index=idx,
-                total_files=len(download_results),
+        # Collect results as files finish, so a slow one doesn't hold up the
+        # ones behind it
+        results = []
+        files_processed = 0
+        # Rows returned by the tasks, inserted SCRAPED_FILE_BATCH_SIZE at a time
+        pending_records = []
+        recorded_files = 0
+        # files_processed is written to the run at most every
+        # PROGRESS_UPDATE_INTERVAL seconds, and once at the end
+        loop = asyncio.get_running_loop()
+        reported_processed = 0
+        last_report = loop.time()
+
+        async def report_progress(force: bool = False) -> None:
+            nonlocal reported_processed, last_report
+            if files_processed == reported_processed:
+                return
+            if not force and loop.time() - last_report < PROGRESS_UPDATE_INTERVAL:
+                return
+            reported_processed = files_processed
+            last_report = loop.time()
+            await asyncio.to_thread(
+                update_run_counts, run_id, files_processed=reported_processed
             )
-            futures.append((idx, file_item, future))
 
-        _log_and_record(
-            run_id,
-            f"Waiting for {len(futures)} processing tasks to complete...",
-        )
+        async def flush_records() -> None:
+            nonlocal files_processed, recorded_files
+            batch = pending_records[:]
+            pending_records.clear()
+            inserted = await asyncio.to_thread(record_scraped_files, batch)
+            if inserted:
+                files_processed += inserted
+                await report_progress()
+            if inserted < len(batch):
+                _log_and_record(
+                    run_id,
+                    f"Recorded {inserted}/{len(batch)} stored files "
+                    f"(the rest were already recorded or failed to insert)",
+                    LogLevel.WARNING,
+                )
+            recorded_files += inserted
 
-        # Wait for all tasks and collect results
-        results = []
-        for idx, file_item, future in futures:
+        for completed in asyncio.as_completed(futures):
+            idx, file_item, result = await completed
             try:
-                result = future.result()
+                if isinstance(result, BaseException):
+                    raise result
+                record = result.pop("record", None)
                 results.append(result)
+                if record:
+                    pending_records.append(record)
+                    if len(pending_records) >= SCRAPED_FILE_BATCH_SIZE:
+                        await flush_records()
 
                 if result.get("success"):
                     stored = result.get("stored", 0)
                     if stored > 0:
-                        update_run_counts(run_id, files_processed=idx)
+                        files_processed += 1
+                        await report_progress()
             except asyncio.TimeoutError:
                 _log_and_record(
                     run_id,
-                    f"Processing task [{idx}/{len(download_results)}] timed out after {PROCESS_FILE_TIMEOUT}s",
+                    f"Processing task [{idx}/{len(futures)}] timed out after {PROCESS_FILE_TIMEOUT}s",
                     LogLevel.ERROR,
                     details={
                         "message_id": file_item["message_id"],
@@ -992,7 +1572,7 @@ async def process_files(
                 # Task failed after all retries
                 _log_and_record(
                     run_id,
-                    f"Processing task [{idx}/{len(download_results)}] failed permanently: {exc}",
+                    f"Processing task [{idx}/{len(futures)}] failed permanently: {exc}",
                     LogLevel.ERROR,
                     details={
                         "message_id": file_item["message_id"],
@@ -1008,12 +1588,15 @@ async def process_files(
                     }
                 )
 
+        if pending_records:
+            await flush_records()
+        await report_progress(force=True)
+
         # Aggregate results
         successful = [r for r in results if r.get("success")]
-        stored_files = sum(r.get("stored", 0) for r in successful)
-        message_ids = set(
-            r.get("message_id") for r in successful if r.get("message_id")
-        )
+        # Successful results always carry "stored" and "message_id"
+        stored_files = recorded_files + sum(r["stored"] for r in successful)
+        message_ids = {r["message_id"] for r in successful}
 
         failed_count = len(results) - len(successful)
 
@@ -1033,6 +1616,10 @@ async def process_files(
         }
 
     finally:
+        # Don't leave files processing once the temp dir is gone
+        for future in futures:
+            future.cancel()
+        await asyncio.gather(*futures, return_exceptions=True)
         temp_dir.cleanup()
 
 
@@ -1079,6 +1666,7 @@ def finalize_run(
             f"Scrape run completed successfully. Stored {results.get('stored', 0)} file(s)",
             LogLevel.INFO,
         )
+    _LOG_BUFFER.flush()
 
 
 @flow(
@@ -1137,4 +1725,5 @@ def telegram_scraper_flow(source_id: str):
                 status=ScrapeStatus.CANCELLED,
                 notes="Cancelled by user during initialization",
             )
+        _LOG_BUFFER.flush()
         raise
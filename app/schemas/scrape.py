@@ -8,7 +8,7 @@ from app.models.scrape import ScrapeStatus, LogLevel
 
 
 class ScrapeLogEntry(BaseModel):
-    id: UUID
+    id: int
     run_id: UUID
     timestamp: datetime
     level: LogLevel
@@ -31,6 +31,7 @@ class ScrapedFileResponse(BaseModel):
     checksum: Optional[str] = None
     size_bytes: Optional[int] = None
     extracted_from: Optional[str] = None
+    member_path: Optional[str] = None
     extra_metadata: dict = Field(default_factory=dict)
     processed_at: datetime
 
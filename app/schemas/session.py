@@ -2,9 +2,13 @@
 Pydantic schemas for Session management
 """
 
+import msgspec
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+from uuid import UUID
+
+from app.models.session import ActiveStatus
 
 
 class SessionCreate(BaseModel):
@@ -30,7 +34,7 @@ class OTPSendRequest(BaseModel):
 class OTPSendResponse(BaseModel):
     """Schema for OTP send response"""
 
-    temp_session_id: str = Field(
+    temp_session_id: UUID = Field(
         ..., description="Temporary session ID for verification"
     )
     phone_number: str
@@ -41,7 +45,7 @@ class OTPSendResponse(BaseModel):
 class OTPVerifyRequest(BaseModel):
     """Schema for verifying OTP"""
 
-    temp_session_id: str = Field(..., description="Temporary session ID from send_otp")
+    temp_session_id: UUID = Field(..., description="Temporary session ID from send_otp")
     code: str = Field(..., description="OTP code from Telegram")
     password: Optional[str] = Field(None, description="2FA password if enabled")
     session_name: Optional[str] = Field(
@@ -52,7 +56,7 @@ class OTPVerifyRequest(BaseModel):
 class SessionFileUploadResponse(BaseModel):
     """Schema for session file upload response"""
 
-    temp_session_id: str
+    temp_session_id: UUID
     phone_number: str
     message: str = "Session file uploaded. Provide a name to save."
 
@@ -60,18 +64,18 @@ class SessionFileUploadResponse(BaseModel):
 class SessionFinalizeRequest(BaseModel):
     """Schema for finalizing session creation"""
 
-    temp_session_id: str = Field(..., description="Temporary session ID")
+    temp_session_id: UUID = Field(..., description="Temporary session ID")
     name: str = Field(..., description="User-friendly name for the session")
 
 
 class SessionResponse(BaseModel):
     """Schema for session response"""
 
-    id: str
+    id: UUID
     name: str
     phone_number: str
     api_id: int
-    is_active: str
+    is_active: ActiveStatus
     created_at: datetime
     updated_at: Optional[datetime] = None
     last_checked_at: Optional[datetime] = None
@@ -94,8 +98,22 @@ class ChannelInfo(BaseModel):
     description: Optional[str] = None
 
 
+class ChannelInfoStruct(msgspec.Struct, kw_only=True):
+    """msgspec mirror of ChannelInfo, encoded directly without Pydantic"""
+
+    id: int
+    username: Optional[str] = None
+    title: str
+    participants_count: Optional[int] = None
+    is_broadcast: bool = False
+    is_megagroup: bool = False
+    is_private: bool
+    access_hash: Optional[int] = None
+    description: Optional[str] = None
+
+
 class SessionUpdate(BaseModel):
     """Schema for updating session"""
 
     name: Optional[str] = None
-    is_active: Optional[str] = None
+    is_active: Optional[ActiveStatus] = None
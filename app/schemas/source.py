@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
+from app.models.session import ActiveStatus
 from app.models.source import TargetEnum, AccessLevelEnum
 
 
@@ -11,7 +12,7 @@ class SourceCreatePrivate(BaseModel):
     name: str = Field(..., description="Source name")
     api_id: int = Field(..., description="Telegram API ID")
     api_hash: str = Field(..., description="Telegram API Hash")
-    session_id: str = Field(..., description="Reference to stored session")
+    session_id: UUID = Field(..., description="Reference to stored session")
     channel_id: int = Field(..., description="Channel ID from Telegram")
     channel_title: str = Field(..., description="Channel display name")
     file_types: List[str] = Field(default=[], description="File types to download")
@@ -50,7 +51,7 @@ class SourceResponse(BaseModel):
     target: TargetEnum
     target_path: Optional[str] = None
     schedule: Optional[str] = None
-    is_active: str
+    is_active: ActiveStatus
     created_at: datetime
     updated_at: Optional[datetime] = None
     last_scraped_at: Optional[datetime] = None
@@ -68,4 +69,4 @@ class SourceUpdate(BaseModel):
     schedule: Optional[str] = None
     file_types: Optional[List[str]] = None
     target_path: Optional[str] = None
-    is_active: Optional[str] = None
+    is_active: Optional[ActiveStatus] = None
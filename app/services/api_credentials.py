@@ -0,0 +1,49 @@
+"""
+Lookup and creation of shared Telegram API credentials
+"""
+
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.api_credential import TelegramApiCredential
+from app.services.encryption import decrypt_data, encrypt_data
+
+
+class ApiHashConflict(ValueError):
+    """A different api_hash was supplied for an api_id that is already stored."""
+
+
+async def get_or_create_api_credential(
+    db: AsyncSession, api_id: int, api_hash: str, verified: bool = False
+) -> TelegramApiCredential:
+    """
+    Return the credential row for api_id, creating it on first use.
+
+    Every session and source using the same api_id shares one ciphertext,
+    so decrypt_data's cache decrypts each api_hash once per process.
+    The stored hash is only replaced when verified is set, i.e. after
+    Telegram accepted the new one in a login; otherwise a mismatch raises
+    ApiHashConflict, since every row sharing the api_id would break.
+    """
+    stmt = select(TelegramApiCredential).where(TelegramApiCredential.api_id == api_id)
+    credential = await db.scalar(stmt)
+
+    if credential is None:
+        # ON CONFLICT: a concurrent request may have inserted the same api_id
+        await db.execute(
+            pg_insert(TelegramApiCredential)
+            .values(id=uuid.uuid4(), api_id=api_id, api_hash=encrypt_data(api_hash))
+            .on_conflict_do_nothing(index_elements=["api_id"])
+        )
+        credential = await db.scalar(stmt)
+    elif decrypt_data(credential.api_hash) != api_hash:
+        if not verified:
+            raise ApiHashConflict(
+                f"api_id {api_id} is already registered with a different api_hash"
+            )
+        credential.api_hash = encrypt_data(api_hash)
+
+    return credential
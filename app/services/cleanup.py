@@ -3,7 +3,6 @@ Background cleanup service for expired temporary sessions
 """
 
 import asyncio
-from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
@@ -19,11 +18,11 @@ async def cleanup_expired_temp_sessions():
         try:
             db: Session = SessionLocal()
 
-            # Delete expired temporary sessions
+            # Delete expired temporary sessions in a single bulk DELETE
             deleted_count = (
                 db.query(TempSession)
-                .filter(TempSession.expires_at < datetime.now(timezone.utc))
-                .delete()
+                .filter(TempSession.is_expired)
+                .delete(synchronize_session=False)
             )
 
             db.commit()
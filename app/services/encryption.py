@@ -1,16 +1,59 @@
+import base64
+import os
+from functools import lru_cache
+from typing import Tuple
+
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from app.core.config import ENCRYPTION_KEY
 
+# Legacy cipher: values written before AES-GCM have no version prefix
 cipher_suite = Fernet(ENCRYPTION_KEY.encode())
 
+# AES-256-GCM keyed from ENCRYPTION_KEY through HKDF, so the existing
+# Fernet key keeps working without a new secret
+_AESGCM_PREFIX = "v2:"
+_aesgcm = AESGCM(
+    HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"telegram-scraper encryption v2",
+    ).derive(base64.urlsafe_b64decode(ENCRYPTION_KEY.encode()))
+)
+
 
 def encrypt_data(data: str) -> str:
     if not data:
         return None
-    return cipher_suite.encrypt(data.encode()).decode()
+    nonce = os.urandom(12)
+    ciphertext = _aesgcm.encrypt(nonce, data.encode(), None)
+    return _AESGCM_PREFIX + base64.urlsafe_b64encode(nonce + ciphertext).decode()
 
 
 def decrypt_data(encrypted_data: str) -> str:
     if not encrypted_data:
         return None
+    return _decrypt_cached(encrypted_data)
+
+
+@lru_cache(maxsize=4096)
+def _decrypt_cached(encrypted_data: str) -> str:
+    # Keyed on the ciphertext: every encryption uses a fresh nonce/IV, so a
+    # re-encrypted value is a different key and the cache can never go stale
+    if encrypted_data.startswith(_AESGCM_PREFIX):
+        raw = base64.urlsafe_b64decode(encrypted_data[len(_AESGCM_PREFIX) :])
+        return _aesgcm.decrypt(raw[:12], raw[12:], None).decode()
     return cipher_suite.decrypt(encrypted_data.encode()).decode()
+
+
+def decrypt_session_credentials(session) -> Tuple[str, str]:
+    """
+    Return the decrypted (api_hash, session_string) of a TelegramSession.
+
+    Both values go through the ciphertext-keyed decrypt cache, so repeated
+    requests against the same session don't pay for decryption every time.
+    """
+    return decrypt_data(session.api_hash), decrypt_data(session.session_string)
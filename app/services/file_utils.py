@@ -1,15 +1,39 @@
+import asyncio
 import hashlib
+import io
+import mmap
+import os
+import shutil
 import tarfile
+import tempfile
 import zipfile
 import re
-from pathlib import Path
-from typing import Iterable, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path, PurePosixPath
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 try:
     import rarfile  # type: ignore
 except ImportError:  # pragma: no cover
     rarfile = None
 
+try:
+    import blake3  # type: ignore
+except ImportError:  # pragma: no cover
+    blake3 = None
+
 
 ARCHIVE_SUFFIXES = {
     ".zip",
@@ -18,26 +42,301 @@ ARCHIVE_SUFFIXES = {
     ".tgz",
 }
 
-ARCHIVE_MULTI_SUFFIXES = {
+# A tuple so it can be passed straight to str.endswith. Every entry has
+# exactly two components, which archive_multi_suffix relies on.
+ARCHIVE_MULTI_SUFFIXES = (
     ".tar.gz",
     ".tar.bz2",
     ".tar.xz",
-}
+)
+_ARCHIVE_MULTI_SUFFIX_SET = frozenset(ARCHIVE_MULTI_SUFFIXES)
+
+
+# Nested archives up to this size are read into memory and streamed member
+# by member; larger ones are spooled to a scratch directory and extracted
+IN_MEMORY_ARCHIVE_LIMIT = 64 * 1024 * 1024
+
+# Files of at least this size are hashed from a memory map, read ahead
+# sequentially and fed to the hasher in MMAP_CHECKSUM_SLICE views without
+# copying; smaller ones go through hashlib.file_digest's reusable buffer
+MMAP_CHECKSUM_MIN_SIZE = 8 * 1024 * 1024
+MMAP_CHECKSUM_SLICE = 1024 * 1024
 
 
-def sha256_checksum(path: Path, chunk_size: int = 65536) -> str:
-    hasher = hashlib.sha256()
+def sha256_checksum(path: Path) -> str:
+    # Both paths hash in C with the GIL released
     with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(chunk_size), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
+        size = os.fstat(handle.fileno()).st_size
+        if size < MMAP_CHECKSUM_MIN_SIZE:
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+        hasher = hashlib.sha256()
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mapped) as view:
+                for offset in range(0, size, MMAP_CHECKSUM_SLICE):
+                    hasher.update(view[offset : offset + MMAP_CHECKSUM_SLICE])
+        return hasher.hexdigest()
+
+
+def new_hasher(algorithm: str = "sha256") -> Any:
+    """Incremental hasher (update/hexdigest) for a file checksum algorithm."""
+    if algorithm == "sha256":
+        return hashlib.sha256()
+    if algorithm == "blake3":
+        if blake3 is None:
+            raise RuntimeError("blake3 package is required for BLAKE3 checksums")
+        # Large updates are hashed on several threads
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    raise ValueError(f"Unsupported checksum algorithm: {algorithm}")
+
+
+def file_checksum(path: Path, algorithm: str = "sha256") -> str:
+    if algorithm == "blake3":
+        hasher = new_hasher(algorithm)
+        hasher.update_mmap(path)
+        return hasher.hexdigest()
+    return sha256_checksum(path)
+
+
+class HashingReader:
+    """
+    Read-only wrapper that feeds every byte read through SHA-256 (or the
+    given hasher), so a stream can be stored and checksummed in a single pass.
+    """
 
+    def __init__(self, stream: IO[bytes], hasher: Optional[Any] = None):
+        self._stream = stream
+        self._hasher = hasher if hasher is not None else hashlib.sha256()
+        self.bytes_read = 0
 
-def is_archive(name: str) -> bool:
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._stream.read(size)
+        self._hasher.update(chunk)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+class HashingWriter:
+    """
+    Write-only wrapper that feeds every byte written through SHA-256, so a
+    download can be checksummed without reading the file back.
+    """
+
+    def __init__(self, stream: IO[bytes], hasher: Optional[Any] = None):
+        self._stream = stream
+        self._hasher = hasher if hasher is not None else hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._hasher.update(data)
+        return self._stream.write(data)
+
+    def flush(self):
+        self._stream.flush()
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+
+class ChunkQueueReader:
+    """
+    Blocking reader over chunks a coroutine puts on a bounded asyncio.Queue,
+    so a storage handler running in a thread can consume a download while
+    it is still arriving. put/close/fail run on the event loop; read runs
+    in the consuming thread.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_chunks: int = 8):
+        self._loop = loop
+        self._queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(max_chunks)
+        self._buffer = bytearray()
+        self._error: Optional[BaseException] = None
+        self._eof = False
+
+    async def put(self, chunk: bytes):
+        await self._queue.put(chunk)
+
+    async def close(self):
+        await self._queue.put(None)
+
+    def fail(self, exc: Optional[BaseException] = None):
+        """
+        End the stream early, dropping queued chunks (which also unblocks a
+        pending put). With exc, read raises instead of returning EOF.
+        """
+        if exc is not None:
+            self._error = exc
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = asyncio.run_coroutine_threadsafe(
+                self._queue.get(), self._loop
+            ).result()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer += chunk
+        if self._error is not None:
+            raise OSError(f"download aborted: {self._error!r}")
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+
+class DirectWriter:
+    """
+    Write-only file opened with O_DIRECT so large downloads bypass the page
+    cache instead of evicting hotter pages.
+
+    Writes are staged in a page-aligned buffer (an anonymous mmap) and
+    flushed in full, aligned blocks; the last partial block is padded and
+    the file truncated to its real size on close. Filesystems without
+    O_DIRECT support (e.g. older tmpfs) fall back to a regular descriptor.
+    """
+
+    BLOCK_SIZE = 4096
+
+    def __init__(self, path: Path, buffer_size: int = 4 * 1024 * 1024):
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        try:
+            self._fd = os.open(path, flags | os.O_DIRECT, 0o644)
+        except OSError:
+            self._fd = os.open(path, flags, 0o644)
+        self._buffer = mmap.mmap(-1, buffer_size)
+        self._view = memoryview(self._buffer)
+        self._used = 0
+        self._size = 0
+
+    def write(self, data: bytes) -> int:
+        data = memoryview(data)
+        written = len(data)
+        while data:
+            take = min(len(data), len(self._buffer) - self._used)
+            self._view[self._used : self._used + take] = data[:take]
+            self._used += take
+            data = data[take:]
+            if self._used == len(self._buffer):
+                os.write(self._fd, self._view)
+                self._used = 0
+        self._size += written
+        return written
+
+    def flush(self):
+        # Only whole blocks can be written with O_DIRECT; the rest is
+        # written on close
+        pass
+
+    def close(self):
+        if self._fd is None:
+            return
+        try:
+            if self._used:
+                padded = -(-self._used // self.BLOCK_SIZE) * self.BLOCK_SIZE
+                os.write(self._fd, self._view[:padded])
+            os.ftruncate(self._fd, self._size)
+            os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._view.release()
+            self._buffer.close()
+
+    def __enter__(self) -> "DirectWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BackgroundWriter:
+    """
+    Write-behind wrapper for a download sink: each write is handed to a
+    dedicated thread, in order, so the disk write (and any hashing in the
+    sink) overlaps with fetching the next chunk instead of blocking the
+    event loop. Used from the event loop only.
+
+    write() returns the oldest pending write as an awaitable once more
+    than max_pending are queued, which Telethon awaits for backpressure.
+    Await drain() before reading the result of the sink.
+    """
+
+    def __init__(self, sink: Any, max_pending: int = 4):
+        self._sink = sink
+        self._max_pending = max_pending
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="download-writer"
+        )
+        self._pending: "deque[asyncio.Future]" = deque()
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> asyncio.Future:
+        # Surface a failed earlier write before queueing more
+        while self._pending and self._pending[0].done():
+            self._pending.popleft().result()
+        future = self._loop.run_in_executor(self._executor, func, *args)
+        self._pending.append(future)
+        return future
+
+    def write(self, data: bytes) -> Any:
+        self._submit(self._sink.write, data)
+        if len(self._pending) > self._max_pending:
+            return self._pending[0]
+        return len(data)
+
+    def flush(self):
+        self._submit(self._sink.flush)
+
+    async def drain(self):
+        """Wait for every queued write, raising the first failure."""
+        while self._pending:
+            await self._pending.popleft()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def archive_multi_suffix(name: str) -> str:
+    """
+    The lowercased multi-part archive suffix of a name (".tar.gz", ...), or
+    "" if it has none. Only the last two components are looked up.
+    """
     lower_name = name.lower()
-    if any(lower_name.endswith(suffix) for suffix in ARCHIVE_MULTI_SUFFIXES):
+    last_dot = lower_name.rfind(".")
+    if last_dot <= 0:
+        return ""
+    candidate = lower_name[lower_name.rfind(".", 0, last_dot) :]
+    return candidate if candidate in _ARCHIVE_MULTI_SUFFIX_SET else ""
+
+
+@lru_cache(maxsize=4096)
+def is_archive(name: str) -> bool:
+    if archive_multi_suffix(name):
         return True
-    return Path(lower_name).suffix in ARCHIVE_SUFFIXES
+    return file_suffix(name).lower() in ARCHIVE_SUFFIXES
+
+
+def archive_stem(name: str) -> str:
+    """Archive file name without its (possibly multi-part) extension."""
+    multi_suffix = archive_multi_suffix(name)
+    if multi_suffix:
+        return name[: -len(multi_suffix)]
+    return Path(name).stem
 
 
 def extract_archive(
@@ -101,9 +400,7 @@ def extract_archive(
             ]
         return extracted_files
 
-    if suffix in {".tar", ".tgz"} or any(
-        name_lower.endswith(end) for end in ARCHIVE_MULTI_SUFFIXES
-    ):
+    if suffix in {".tar", ".tgz"} or name_lower.endswith(ARCHIVE_MULTI_SUFFIXES):
         mode = "r"
         if name_lower.endswith(".tar.gz"):
             mode = "r:gz"
@@ -244,12 +541,8 @@ def extract_archive_recursive(
     all_extracted_files: List[Path] = []
 
     # Create extraction directory with archive name
-    archive_name_without_ext = archive_path.stem
     # Handle multi-part extensions like .tar.gz
-    for multi_ext in ARCHIVE_MULTI_SUFFIXES:
-        if archive_path.name.lower().endswith(multi_ext):
-            archive_name_without_ext = archive_path.name[: -len(multi_ext)]
-            break
+    archive_name_without_ext = archive_stem(archive_path.name)
 
     extract_dir = destination / f"{archive_name_without_ext}_extracted"
     extract_dir.mkdir(parents=True, exist_ok=True)
@@ -281,19 +574,242 @@ def extract_archive_recursive(
     return all_extracted_files
 
 
+def file_suffix(name: str) -> str:
+    """PurePosixPath(name).suffix, without building a path object."""
+    base = name[name.rfind("/") + 1 :]
+    index = base.rfind(".")
+    if index <= 0 or index == len(base) - 1:
+        return ""
+    return base[index:]
+
+
+def allowed_file_filter(
+    allowed_extensions: Optional[Iterable[str]],
+) -> Callable[[str], bool]:
+    """
+    Build a predicate on file names: True when the extension is allowed.
+    Files without an extension pass only if "" is an allowed extension.
+    """
+    if not allowed_extensions:
+        return lambda name: True
+    normalized = frozenset(ext.lower().lstrip(".") for ext in allowed_extensions)
+    return lambda name: file_suffix(name).lower().lstrip(".") in normalized
+
+
 def filter_allowed_files(
     paths: Iterable[Path], allowed_extensions: Optional[Iterable[str]]
 ) -> List[Path]:
-    if not allowed_extensions:
-        return list(paths)
-    normalized = {ext.lower().lstrip(".") for ext in allowed_extensions}
-    filtered: List[Path] = []
-    for path in paths:
-        if path.suffix:
-            if path.suffix.lower().lstrip(".") in normalized:
-                filtered.append(path)
+    allowed = allowed_file_filter(allowed_extensions)
+    return [path for path in paths if allowed(path.name)]
+
+
+# (name, stream, size) of a file inside an archive
+ArchiveMember = Tuple[str, IO[bytes], int]
+# Lists (member name, size, opener) given a scratch directory
+_MemberLister = Callable[[Path], Iterable[Tuple[str, int, Callable[[], IO[bytes]]]]]
+
+
+def _safe_member_path(name: str) -> PurePosixPath:
+    """Member name made relative, without parent references."""
+    return PurePosixPath(
+        *[part for part in PurePosixPath(name).parts if part not in ("/", "..")]
+    )
+
+
+def _find_password(
+    passwords: List[str],
+    try_password: Callable[[str], None],
+    errors: Tuple[type, ...],
+    kind: str,
+) -> str:
+    for pwd in passwords:
+        try:
+            try_password(pwd)
+            return pwd
+        except errors:
+            continue
+    raise RuntimeError(
+        f"{kind} archive is password-protected. Tried {len(passwords)} password(s), none worked."
+    )
+
+
+def _drain(stream: IO[bytes]):
+    with stream:
+        while stream.read(1024 * 1024):
+            pass
+
+
+def extract_archive_stream(
+    archive_path: Path,
+    passwords: Optional[List[str]] = None,
+    max_depth: int = 5,
+) -> Iterator[ArchiveMember]:
+    """
+    Iterate the files of an archive without extracting it to disk.
+
+    Yields (name, stream, size) tuples. Names are laid out like the paths
+    extract_archive_recursive produces relative to its destination
+    ("<archive>_extracted/<member>"), and each stream is only valid until the
+    next member is requested.
+
+    Nested archives and solid RAR archives cannot be read member by member,
+    so they are extracted to a scratch directory instead; a nested archive
+    that fails to extract is yielded as a regular file.
+
+    The archive is opened and any password checked before this returns, so
+    password and format errors are raised here rather than mid-iteration.
+    """
+    return _open_archive_stream(
+        archive_path,
+        archive_path.name,
+        passwords or [],
+        max_depth,
+        f"{archive_stem(archive_path.name)}_extracted",
+    )
+
+
+def _open_archive_stream(
+    source: Union[Path, IO[bytes]],
+    name: str,
+    passwords: List[str],
+    max_depth: int,
+    prefix: str,
+) -> Iterator[ArchiveMember]:
+    """extract_archive_stream for an archive file or an in-memory archive."""
+    name_lower = name.lower()
+    suffix = PurePosixPath(name_lower).suffix
+
+    if suffix == ".zip":
+        archive = zipfile.ZipFile(source, "r")
+        try:
+            encrypted = [info for info in archive.infolist() if info.flag_bits & 0x1]
+            if encrypted:
+                # Read a whole member so a wrong password also fails the CRC
+                smallest = min(encrypted, key=lambda info: info.file_size)
+                pwd = _find_password(
+                    passwords,
+                    lambda pwd: _drain(archive.open(smallest, pwd=pwd.encode("utf-8"))),
+                    (RuntimeError, zipfile.BadZipFile),
+                    "ZIP",
+                )
+                archive.setpassword(pwd.encode("utf-8"))
+        except BaseException:
+            archive.close()
+            raise
+
+        def members(scratch: Path):
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, partial(archive.open, info)
+
+    elif suffix in {".tar", ".tgz"} or name_lower.endswith(ARCHIVE_MULTI_SUFFIXES):
+        if isinstance(source, Path):
+            archive = tarfile.open(source, "r:*")
         else:
-            # Keep files without extension if extensions list allows empty string
-            if "" in normalized:
-                filtered.append(path)
-    return filtered
+            archive = tarfile.open(fileobj=source, mode="r:*")
+
+        def members(scratch: Path):
+            for member in archive:
+                if member.isfile():
+                    yield member.name, member.size, partial(archive.extractfile, member)
+
+    elif suffix == ".rar":
+        if rarfile is None:
+            raise RuntimeError("rarfile package is required to extract .rar archives")
+
+        archive = rarfile.RarFile(source)
+        try:
+            if archive.needs_password():
+
+                def try_password(pwd: str):
+                    archive.setpassword(pwd)
+                    files = [info for info in archive.infolist() if not info.isdir()]
+                    if files:
+                        smallest = min(files, key=lambda info: info.file_size)
+                        _drain(archive.open(smallest))
+
+                _find_password(passwords, try_password, (rarfile.Error,), "RAR")
+        except BaseException:
+            archive.close()
+            raise
+
+        if archive.is_solid():
+            # Each member of a solid archive is decompressed from the start
+            # of its block, so extract everything in one pass instead
+            def members(scratch: Path):
+                destination = scratch / "solid"
+                archive.extractall(destination)
+                for path in sorted(destination.rglob("*")):
+                    if path.is_file():
+                        name = path.relative_to(destination).as_posix()
+                        yield name, path.stat().st_size, partial(path.open, "rb")
+
+        else:
+
+            def members(scratch: Path):
+                for info in archive.infolist():
+                    if not info.isdir():
+                        yield info.filename, info.file_size, partial(archive.open, info)
+
+    else:
+        raise ValueError(f"Unsupported archive type: {PurePosixPath(name).suffix}")
+
+    return _iter_archive_members(archive, members, prefix, passwords, max_depth)
+
+
+def _iter_archive_members(
+    archive,
+    members: _MemberLister,
+    prefix: str,
+    passwords: List[str],
+    max_depth: int,
+) -> Iterator[ArchiveMember]:
+    with archive, tempfile.TemporaryDirectory() as scratch_dir:
+        scratch = Path(scratch_dir)
+        for name, size, open_member in members(scratch):
+            member_path = _safe_member_path(name)
+            structured_name = f"{prefix}/{member_path}"
+
+            if not is_archive(member_path.name) or max_depth <= 1:
+                with open_member() as stream:
+                    yield structured_name, stream, size
+                continue
+
+            if size <= IN_MEMORY_ARCHIVE_LIMIT:
+                # Small nested archive: read it into memory and stream its
+                # members under the names extract_archive_recursive would use
+                with open_member() as stream:
+                    data = io.BytesIO(stream.read())
+                nested_prefix = PurePosixPath(
+                    prefix,
+                    member_path.parent,
+                    f"{archive_stem(member_path.name)}_extracted",
+                ).as_posix()
+                try:
+                    yield from _open_archive_stream(
+                        data, member_path.name, passwords, max_depth - 1, nested_prefix
+                    )
+                except Exception:
+                    data.seek(0)
+                    yield structured_name, data, size
+                continue
+
+            # Larger nested archive: spool it next to where
+            # extract_archive_recursive would have put it and extract it there
+            nested = scratch / "nested" / member_path
+            nested.parent.mkdir(parents=True, exist_ok=True)
+            with open_member() as stream, nested.open("wb") as handle:
+                shutil.copyfileobj(stream, handle, 1024 * 1024)
+            try:
+                extracted = extract_archive_recursive(
+                    nested, nested.parent, passwords, 1, max_depth
+                )
+            except Exception:
+                with nested.open("rb") as stream:
+                    yield structured_name, stream, size
+                continue
+
+            for path in extracted:
+                relative = path.relative_to(scratch / "nested").as_posix()
+                with path.open("rb") as stream:
+                    yield f"{prefix}/{relative}", stream, path.stat().st_size
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import threading
+from collections import defaultdict
 from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, Iterable, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import UUID as UUIDType
 import logging
 
 # Note: avoid importing sqlalchemy.exc directly to prevent linter/import issues
+from sqlalchemy import func, insert, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.database import SessionLocal
 from app.models.scrape import (
@@ -39,11 +43,9 @@ def create_scrape_run(source_id: str, flow_run_id: Optional[str] = None) -> Scra
             source_id=_to_uuid(source_id),
             flow_run_id=flow_run_id,
             status=ScrapeStatus.RUNNING,
-            started_at=datetime.now(timezone.utc),
         )
         db.add(run)
         db.commit()
-        db.refresh(run)
         return run
 
 
@@ -64,16 +66,22 @@ def update_run_counts(
     run_id: str,
     files_found: Optional[int] = None,
     files_processed: Optional[int] = None,
+    last_scanned_message_id: Optional[int] = None,
 ):
+    values: Dict[str, Any] = {}
+    if files_found is not None:
+        values["total_files_found"] = files_found
+    if files_processed is not None:
+        values["total_files_processed"] = files_processed
+    if last_scanned_message_id is not None:
+        values["last_scanned_message_id"] = last_scanned_message_id
+    if not values:
+        return
+    # One UPDATE round trip; a missing run simply matches no row
     with get_db_session() as db:
-        run_uuid = _to_uuid(run_id)
-        run = db.query(ScrapeRun).filter(ScrapeRun.id == run_uuid).first()
-        if not run:
-            return
-        if files_found is not None:
-            run.total_files_found = files_found
-        if files_processed is not None:
-            run.total_files_processed = files_processed
+        db.execute(
+            update(ScrapeRun).where(ScrapeRun.id == _to_uuid(run_id)).values(values)
+        )
         db.commit()
 
 
@@ -104,14 +112,108 @@ def log_event(
             level=level,
             message=message,
             details=details,
-            timestamp=datetime.now(timezone.utc),
         )
         db.add(log_entry)
         db.commit()
-        db.refresh(log_entry)
         return log_entry
 
 
+def log_events(
+    run_id: str,
+    entries: Iterable[Tuple[str, LogLevel, Optional[Dict]]],
+) -> int:
+    """
+    Bulk variant of log_event: insert (message, level, details) entries for
+    one run with a single executemany. Returns the number of rows written.
+    """
+    logger = logging.getLogger(__name__)
+    run_uuid = _to_uuid(run_id)
+    rows = [
+        {
+            "run_id": run_uuid,
+            "level": level,
+            "message": message,
+            "details": details,
+        }
+        for message, level, details in entries
+    ]
+    if not rows:
+        return 0
+
+    with get_db_session() as db:
+        if db.get(ScrapeRun, run_uuid) is None:
+            logger.warning(
+                "log_events: attempt to write %s logs for missing run %s",
+                len(rows),
+                run_id,
+            )
+            return 0
+        db.execute(insert(ScrapeLog), rows)
+        db.commit()
+        return len(rows)
+
+
+class LogBuffer:
+    """
+    Collects scrape log entries and writes them with log_events, one insert
+    per run, from a background thread: as soon as batch_size entries are
+    waiting, otherwise every flush_interval seconds. Safe to use from any
+    thread; call flush() before relying on the logs being stored.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._entries: List[Tuple[str, str, LogLevel, Optional[Dict]]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(
+        self,
+        run_id: str,
+        message: str,
+        level: LogLevel = LogLevel.INFO,
+        details: Optional[Dict] = None,
+    ) -> None:
+        with self._lock:
+            self._entries.append((run_id, message, level, details))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="scrape-log-buffer", daemon=True
+                )
+                self._thread.start()
+            if len(self._entries) >= self.batch_size:
+                self._wakeup.set()
+
+    def flush(self) -> None:
+        # One flush at a time keeps the entries of a run in order
+        with self._flush_lock:
+            with self._lock:
+                entries, self._entries = self._entries, []
+            by_run: Dict[str, List[Tuple[str, LogLevel, Optional[Dict]]]] = defaultdict(
+                list
+            )
+            for run_id, message, level, details in entries:
+                by_run[run_id].append((message, level, details))
+            for run_id, run_entries in by_run.items():
+                try:
+                    log_events(run_id, run_entries)
+                except Exception:
+                    logging.getLogger(__name__).exception(
+                        "LogBuffer: failed to write %s logs for run %s",
+                        len(run_entries),
+                        run_id,
+                    )
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
 def record_scraped_file(
     run_id: str,
     source_id: str,
@@ -123,6 +225,7 @@ def record_scraped_file(
     size_bytes: Optional[int] = None,
     checksum: Optional[str] = None,
     extracted_from: Optional[str] = None,
+    member_path: Optional[str] = None,
     extra_metadata: Optional[Dict] = None,
     archive_checksum: Optional[str] = None,
 ) -> Optional[ScrapedFile]:
@@ -139,6 +242,7 @@ def record_scraped_file(
             checksum=checksum,
             archive_checksum=archive_checksum,
             extracted_from=extracted_from,
+            member_path=member_path,
             extra_metadata=extra_metadata or {},
         )
         db.add(file_entry)
@@ -155,19 +259,52 @@ def record_scraped_file(
             )
             db.rollback()
             return None
-        db.refresh(file_entry)
         return file_entry
 
 
-def get_processed_file_keys(source_id: str) -> Set[Tuple[int, str]]:
+def get_last_scanned_message_id(source_id: str) -> Optional[int]:
+    """Highest scan watermark recorded by a previous run of this source."""
+    with get_db_session() as db:
+        return (
+            db.query(func.max(ScrapeRun.last_scanned_message_id))
+            .filter(ScrapeRun.source_id == _to_uuid(source_id))
+            .scalar()
+        )
+
+
+def get_processed_file_keys_in(
+    source_id: str, keys: Iterable[Tuple[int, str]]
+) -> Set[Tuple[int, str]]:
+    """
+    The (message_id, file_id) keys among the given ones that were already
+    processed for this source, found with one query on uix_source_message_file.
+    """
+    keys = list(keys)
+    if not keys:
+        return set()
+    with get_db_session() as db:
+        query = db.query(ScrapedFile.message_id, ScrapedFile.file_id).filter(
+            ScrapedFile.source_id == _to_uuid(source_id),
+            tuple_(ScrapedFile.message_id, ScrapedFile.file_id).in_(keys),
+        )
+        return set(query.tuples())
+
+
+def get_recorded_file_ids(source_id: str, file_ids: Iterable[str]) -> Set[str]:
+    """The given file_ids already recorded for this source, by any message."""
+    file_ids = list(file_ids)
+    if not file_ids:
+        return set()
     with get_db_session() as db:
-        source_uuid = _to_uuid(source_id)
         rows = (
-            db.query(ScrapedFile.message_id, ScrapedFile.file_id)
-            .filter(ScrapedFile.source_id == source_uuid)
-            .all()
+            db.query(ScrapedFile.file_id)
+            .filter(
+                ScrapedFile.source_id == _to_uuid(source_id),
+                ScrapedFile.file_id.in_(file_ids),
+            )
+            .distinct()
         )
-        return {(message_id, file_id) for message_id, file_id in rows}
+        return {file_id for (file_id,) in rows}
 
 
 def get_processed_archive_checksums(source_id: str) -> Set[str]:
@@ -190,3 +327,47 @@ def get_processed_archive_checksums(source_id: str) -> Set[str]:
             .all()
         )
         return {checksum for (checksum,) in rows if checksum}
+
+
+def record_scraped_files(rows: List[Dict[str, Any]]) -> int:
+    """
+    Bulk variant of record_scraped_file for a batch of files (e.g. the
+    contents of one archive). rows hold ScrapedFile column values; run_id and
+    source_id may be strings.
+
+    Uses one Core INSERT executemany instead of an ORM add/commit per file.
+    Rows that already exist (uix_source_message_file) are skipped rather
+    than failing the batch. Returns the number of rows inserted.
+    """
+    if not rows:
+        return 0
+
+    values = [
+        {
+            **row,
+            "run_id": _to_uuid(row["run_id"]),
+            "source_id": _to_uuid(row["source_id"]),
+            "extra_metadata": row.get("extra_metadata") or {},
+        }
+        for row in rows
+    ]
+    stmt = (
+        pg_insert(ScrapedFile)
+        .on_conflict_do_nothing(constraint="uix_source_message_file")
+        .returning(ScrapedFile.id)
+    )
+    with get_db_session() as db:
+        try:
+            inserted = len(db.execute(stmt, values).all())
+            db.commit()
+        except Exception as e:
+            logger = logging.getLogger(__name__)
+            logger.exception(
+                "record_scraped_files: failed to commit %s scraped files (run=%s): %s",
+                len(values),
+                rows[0]["run_id"],
+                e,
+            )
+            db.rollback()
+            return 0
+        return inserted
@@ -1,12 +1,31 @@
 import os
 import shutil
+from contextlib import closing
 import uuid
 import re
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 from app.models.source import TargetEnum
+from app.services.file_utils import (
+    ArchiveMember,
+    HashingReader,
+    allowed_file_filter,
+    extract_archive_stream,
+    file_checksum,
+    new_hasher,
+)
 
 
 def sanitize_name(name: str) -> str:
@@ -75,6 +94,7 @@ except ImportError:  # pragma: no cover
 
 # Import NAS configuration from centralized config
 from app.core.config import (
+    FILE_CHECKSUM_ALGORITHM,
     NAS_SERVER,
     NAS_SHARE,
     NAS_USERNAME,
@@ -83,6 +103,43 @@ from app.core.config import (
 )
 
 
+def _kernel_copy(source: str, destination: Path):
+    """
+    Copy a file without moving its bytes through userspace. copy_file_range
+    shares extents on reflink filesystems (btrfs, XFS); when it is
+    unavailable or refused (e.g. EXDEV across filesystems on older kernels),
+    shutil.copyfile falls back to sendfile.
+    """
+    if hasattr(os, "copy_file_range"):
+        with open(source, "rb") as src, destination.open("wb") as dst:
+            remaining = os.fstat(src.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if not copied:
+                        break
+                    remaining -= copied
+                if remaining <= 0:
+                    return
+            except OSError:
+                pass
+    shutil.copyfile(source, destination)
+
+
+def _link_or_copy(source: str, destination: Path):
+    """
+    Hard-link source into place when both are on the same filesystem (no
+    bytes copied, and the source stays for a retry), else _kernel_copy.
+    """
+    try:
+        destination.unlink(missing_ok=True)
+        os.link(source, destination)
+    except OSError:
+        # EXDEV across filesystems, or links unsupported (e.g. some SMB/FUSE)
+        _kernel_copy(source, destination)
+        shutil.copystat(source, destination)
+
+
 class StorageHandler(ABC):
     def __init__(
         self,
@@ -99,6 +156,23 @@ class StorageHandler(ABC):
     @abstractmethod
     def store_file(self, local_path: str, relative_name: str) -> str: ...
 
+    @abstractmethod
+    def store_fileobj(self, fileobj: BinaryIO, relative_name: str) -> str:
+        """Store the contents of a readable binary stream, read to EOF once."""
+
+    def store_file_with_checksum(
+        self, local_path: str, relative_name: str
+    ) -> Tuple[str, str]:
+        """
+        Store a file and return (storage_path, checksum hex digest), hashing
+        the blocks as they are written instead of reading the file twice.
+        The checksum uses FILE_CHECKSUM_ALGORITHM.
+        """
+        with open(local_path, "rb") as local_file:
+            reader = HashingReader(local_file, new_hasher(FILE_CHECKSUM_ALGORITHM))
+            storage_path = self.store_fileobj(reader, relative_name)
+        return storage_path, reader.hexdigest()
+
 
 class LocalStorageHandler(StorageHandler):
     def __init__(
@@ -119,7 +193,25 @@ class LocalStorageHandler(StorageHandler):
         safe_name = sanitize_path(relative_name)
         destination = self.base_path / safe_name
         destination.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(local_path, destination)
+        _link_or_copy(local_path, destination)
+        return str(destination)
+
+    def store_file_with_checksum(
+        self, local_path: str, relative_name: str
+    ) -> Tuple[str, str]:
+        """
+        Copy the file inside the kernel and hash the source from a memory
+        map, instead of passing every block through Python twice.
+        """
+        storage_path = self.store_file(local_path, relative_name)
+        return storage_path, file_checksum(Path(local_path), FILE_CHECKSUM_ALGORITHM)
+
+    def store_fileobj(self, fileobj: BinaryIO, relative_name: str) -> str:
+        safe_name = sanitize_path(relative_name)
+        destination = self.base_path / safe_name
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with destination.open("wb") as handle:
+            shutil.copyfileobj(fileobj, handle, 1024 * 1024)
         return str(destination)
 
 
@@ -156,6 +248,11 @@ class NASStorageHandler(StorageHandler):
 
     def store_file(self, local_path: str, relative_name: str) -> str:
         """Upload a file to the NAS share via SMB."""
+        with open(local_path, "rb") as local_file:
+            return self.store_fileobj(local_file, relative_name)
+
+    def store_fileobj(self, fileobj: BinaryIO, relative_name: str) -> str:
+        """Upload the contents of a stream to the NAS share via SMB."""
         # Sanitize the path while preserving directory structure
         safe_name = sanitize_path(relative_name)
 
@@ -219,14 +316,13 @@ class NASStorageHandler(StorageHandler):
                 impersonation_level=ImpersonationLevel.Impersonation,
             )
 
-            with open(local_path, "rb") as local_file:
-                offset = 0
-                while True:
-                    chunk = local_file.read(1024 * 1024)  # 1MB chunks
-                    if not chunk:
-                        break
-                    file_open.write(chunk, offset)
-                    offset += len(chunk)
+            offset = 0
+            while True:
+                chunk = fileobj.read(1024 * 1024)  # 1MB chunks
+                if not chunk:
+                    break
+                file_open.write(chunk, offset)
+                offset += len(chunk)
 
             file_open.close()
             tree.disconnect()
@@ -275,7 +371,7 @@ class S3StorageHandler(StorageHandler):
         self.prefix = normalized_prefix
         self.s3 = boto3.client("s3")
 
-    def store_file(self, local_path: str, relative_name: str) -> str:
+    def _key(self, relative_name: str) -> str:
         # Sanitize the path while preserving directory structure
         safe_name = sanitize_path(relative_name)
         key_parts = [
@@ -287,10 +383,18 @@ class S3StorageHandler(StorageHandler):
             ]
             if part
         ]
-        key = "/".join(key_parts)
+        return "/".join(key_parts)
+
+    def store_file(self, local_path: str, relative_name: str) -> str:
+        key = self._key(relative_name)
         self.s3.upload_file(local_path, self.bucket, key)
         return f"s3://{self.bucket}/{key}"
 
+    def store_fileobj(self, fileobj: BinaryIO, relative_name: str) -> str:
+        key = self._key(relative_name)
+        self.s3.upload_fileobj(fileobj, self.bucket, key)
+        return f"s3://{self.bucket}/{key}"
+
 
 def get_storage_handler(
     target: TargetEnum,
@@ -307,3 +411,46 @@ def get_storage_handler(
         return S3StorageHandler(source_id, source_name, run_id, target_path)
 
     raise ValueError(f"Unsupported storage target: {target}")
+
+
+# (name, storage_path, checksum hex digest, size in bytes) of a stored member
+StoredMember = Tuple[str, str, str, int]
+
+
+def store_archive_members(
+    storage: StorageHandler,
+    members: Iterator[ArchiveMember],
+    allowed: Callable[[str], bool],
+) -> Tuple[int, List[StoredMember]]:
+    """
+    Store the allowed members of an archive, checksumming each while it is
+    written. Returns the number of members seen and the stored ones.
+    """
+    extracted_count = 0
+    stored: List[StoredMember] = []
+    with closing(members):
+        for name, stream, _size in members:
+            extracted_count += 1
+            if not allowed(name):
+                continue
+            reader = HashingReader(stream, new_hasher(FILE_CHECKSUM_ALGORITHM))
+            storage_path = storage.store_fileobj(reader, name)
+            stored.append((name, storage_path, reader.hexdigest(), reader.bytes_read))
+    return extracted_count, stored
+
+
+def store_archive_in_process(
+    storage_options: Dict[str, Any],
+    archive_path: str,
+    passwords: List[str],
+    allowed_extensions: Iterable[str],
+) -> Tuple[int, List[StoredMember]]:
+    """
+    store_archive_members for a worker process: everything it needs is
+    rebuilt from picklable arguments.
+    """
+    return store_archive_members(
+        get_storage_handler(**storage_options),
+        extract_archive_stream(Path(archive_path), passwords),
+        allowed_file_filter(allowed_extensions),
+    )
@@ -4,14 +4,31 @@ Telegram Client Service using Telethon for channel discovery and interaction
 
 from telethon import TelegramClient
 from telethon.sessions import StringSession, SQLiteSession
+from telethon.tl.functions import PingRequest
 from telethon.tl.types import Channel, Chat
 from telethon.errors import SessionPasswordNeededError, PhoneCodeInvalidError
+from collections import OrderedDict
 from typing import List, Dict, Optional, Tuple
 import asyncio
 import os
+import random
 import tempfile
+import time
 import base64
 
+from app.core.config import TELEGRAM_CLIENT_POOL_SIZE, TELEGRAM_SESSION_VERIFY_TTL
+from app.schemas.session import ChannelInfoStruct
+
+# Connected clients keyed by session id, in least-recently-used order.
+# Each entry keeps the session string and event loop it was built with so
+# rotated credentials (or a new loop) get a fresh client.
+_CLIENTS: "OrderedDict[str, Tuple[TelegramClient, str, asyncio.AbstractEventLoop]]" = (
+    OrderedDict()
+)
+_CLIENTS_LOCK = asyncio.Lock()
+# Monotonic time of the last full authorization check per pooled session
+_VERIFIED_AT: Dict[str, float] = {}
+
 
 class TelegramClientService:
     """
@@ -19,6 +36,79 @@ class TelegramClientService:
     Supports interactive OTP login and session file conversion
     """
 
+    @staticmethod
+    async def get_or_create_client(
+        session_id: str, api_id: int, api_hash: str, session_string: str
+    ) -> TelegramClient:
+        """
+        Return a connected client for a stored session, reusing a pooled one
+
+        Args:
+            session_id: Stored session ID used as the pool key
+            api_id: Telegram API ID
+            api_hash: Telegram API Hash
+            session_string: Telethon StringSession data
+
+        Returns:
+            Connected TelegramClient (owned by the pool, do not disconnect)
+        """
+        async with _CLIENTS_LOCK:
+            entry = _CLIENTS.get(session_id)
+            if entry is not None:
+                client, pooled_string, pooled_loop = entry
+                if (
+                    pooled_string == session_string
+                    and pooled_loop is asyncio.get_running_loop()
+                ):
+                    if not client.is_connected():
+                        await client.connect()
+                    _CLIENTS.move_to_end(session_id)
+                    return client
+
+                del _CLIENTS[session_id]
+                await TelegramClientService._disconnect_quietly(client)
+
+            client = TelegramClient(StringSession(session_string), api_id, api_hash)
+            await client.connect()
+            _CLIENTS[session_id] = (
+                client,
+                session_string,
+                asyncio.get_running_loop(),
+            )
+
+            # Evict least recently used clients beyond the pool size
+            while len(_CLIENTS) > TELEGRAM_CLIENT_POOL_SIZE:
+                _, (evicted, _, _) = _CLIENTS.popitem(last=False)
+                await TelegramClientService._disconnect_quietly(evicted)
+
+            return client
+
+    @staticmethod
+    async def release_client(session_id: str):
+        """Drop a pooled client (e.g. after its session stopped being authorized)"""
+        async with _CLIENTS_LOCK:
+            entry = _CLIENTS.pop(session_id, None)
+            _VERIFIED_AT.pop(session_id, None)
+        if entry is not None:
+            await TelegramClientService._disconnect_quietly(entry[0])
+
+    @staticmethod
+    async def close_all_clients():
+        """Disconnect every pooled client (called on application shutdown)"""
+        async with _CLIENTS_LOCK:
+            clients = [entry[0] for entry in _CLIENTS.values()]
+            _CLIENTS.clear()
+            _VERIFIED_AT.clear()
+        for client in clients:
+            await TelegramClientService._disconnect_quietly(client)
+
+    @staticmethod
+    async def _disconnect_quietly(client: TelegramClient):
+        try:
+            await client.disconnect()
+        except Exception as e:
+            print(f"Warning: Failed to disconnect Telegram client: {e}")
+
     @staticmethod
     async def send_otp(
         api_id: int, api_hash: str, phone_number: str
@@ -190,8 +280,11 @@ class TelegramClientService:
 
     @staticmethod
     async def get_user_channels(
-        api_id: int, api_hash: str, session_string: str
-    ) -> List[Dict]:
+        api_id: int,
+        api_hash: str,
+        session_string: str,
+        session_id: Optional[str] = None,
+    ) -> List[ChannelInfoStruct]:
         """
         Fetch all channels and groups accessible by the user session
 
@@ -199,16 +292,25 @@ class TelegramClientService:
             api_id: Telegram API ID
             api_hash: Telegram API Hash
             session_string: Telethon StringSession data
+            session_id: Stored session ID; when given, a pooled client is reused
 
         Returns:
-            List of channel information dictionaries
+            List of ChannelInfoStruct entries
         """
-        client = TelegramClient(StringSession(session_string), api_id, api_hash)
+        if session_id is not None:
+            client = await TelegramClientService.get_or_create_client(
+                session_id, api_id, api_hash, session_string
+            )
+        else:
+            client = TelegramClient(StringSession(session_string), api_id, api_hash)
 
         try:
-            await client.connect()
+            if session_id is None:
+                await client.connect()
 
             if not await client.is_user_authorized():
+                if session_id is not None:
+                    await TelegramClientService.release_client(session_id)
                 raise Exception("Session is not authorized")
 
             # Get all dialogs (chats, channels, groups)
@@ -220,43 +322,44 @@ class TelegramClientService:
 
                 # Filter only channels and supergroups
                 if isinstance(entity, Channel):
-                    channel_info = {
-                        "id": entity.id,
-                        "username": (
+                    channel_info = ChannelInfoStruct(
+                        id=entity.id,
+                        username=(
                             entity.username if hasattr(entity, "username") else None
                         ),
-                        "title": entity.title,
-                        "participants_count": (
+                        title=entity.title,
+                        participants_count=(
                             entity.participants_count
                             if hasattr(entity, "participants_count")
                             else None
                         ),
-                        "is_broadcast": (
+                        is_broadcast=(
                             entity.broadcast if hasattr(entity, "broadcast") else False
                         ),
-                        "is_megagroup": (
+                        is_megagroup=(
                             entity.megagroup if hasattr(entity, "megagroup") else False
                         ),
-                        "access_hash": (
+                        access_hash=(
                             entity.access_hash
                             if hasattr(entity, "access_hash")
                             else None
                         ),
-                        "is_private": (
+                        is_private=(
                             not bool(entity.username)
                             if hasattr(entity, "username")
                             else True
                         ),
-                        "description": (
+                        description=(
                             entity.about if hasattr(entity, "about") else None
                         ),
-                    }
+                    )
                     channels.append(channel_info)
 
             return channels
 
         finally:
-            await client.disconnect()
+            if session_id is None:
+                await client.disconnect()
 
     @staticmethod
     async def verify_public_channel(
@@ -313,7 +416,12 @@ class TelegramClientService:
             await client.disconnect()
 
     @staticmethod
-    async def test_session(api_id: int, api_hash: str, session_string: str) -> bool:
+    async def test_session(
+        api_id: int,
+        api_hash: str,
+        session_string: str,
+        session_id: Optional[str] = None,
+    ) -> bool:
         """
         Test if a session is valid and authorized
 
@@ -321,10 +429,44 @@ class TelegramClientService:
             api_id: Telegram API ID
             api_hash: Telegram API Hash
             session_string: Telethon StringSession data
+            session_id: Stored session ID; when given, a pooled client is reused
 
         Returns:
             True if session is valid and authorized, False otherwise
         """
+        if session_id is not None:
+            verified_at = _VERIFIED_AT.get(session_id)
+            if (
+                verified_at is not None
+                and time.monotonic() - verified_at < TELEGRAM_SESSION_VERIFY_TTL
+            ):
+                # Recently verified: a ping on the open connection is enough
+                try:
+                    client = await TelegramClientService.get_or_create_client(
+                        session_id, api_id, api_hash, session_string
+                    )
+                    await client(PingRequest(ping_id=random.getrandbits(63)))
+                    return True
+                except Exception as e:
+                    print(f"Session ping failed, re-checking authorization: {e}")
+                    await TelegramClientService.release_client(session_id)
+
+            try:
+                client = await TelegramClientService.get_or_create_client(
+                    session_id, api_id, api_hash, session_string
+                )
+                # get_me() goes over the wire; is_user_authorized() is cached
+                # on a pooled client after its first call
+                is_authorized = await client.get_me() is not None
+            except Exception as e:
+                print(f"Session test failed: {e}")
+                is_authorized = False
+            if is_authorized:
+                _VERIFIED_AT[session_id] = time.monotonic()
+            else:
+                await TelegramClientService.release_client(session_id)
+            return is_authorized
+
         client = TelegramClient(StringSession(session_string), api_id, api_hash)
 
         try:
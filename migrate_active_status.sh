@@ -0,0 +1,27 @@
+#!/bin/bash
+# Run this script when containers are running to convert is_active columns to the active_status enum
+# Usage: ./migrate_active_status.sh
+
+echo "Converting telegram_sessions.is_active and sources.is_active to active_status..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+DO \$\$ BEGIN
+    CREATE TYPE active_status AS ENUM ('active', 'inactive', 'expired', 'revoked');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END \$\$;
+UPDATE telegram_sessions SET is_active = 'active' WHERE is_active IS NULL;
+UPDATE sources SET is_active = 'active' WHERE is_active IS NULL;
+UPDATE sources SET is_active = 'inactive' WHERE is_active NOT IN ('active', 'inactive', 'expired', 'revoked');
+ALTER TABLE telegram_sessions ALTER COLUMN is_active TYPE active_status USING is_active::active_status;
+ALTER TABLE telegram_sessions ALTER COLUMN is_active SET NOT NULL;
+ALTER TABLE sources ALTER COLUMN is_active TYPE active_status USING is_active::active_status;
+ALTER TABLE sources ALTER COLUMN is_active SET NOT NULL;
+COMMIT;
+"
+
+echo "Verifying column types..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d telegram_sessions"
+docker exec telegram_scraper_db psql -U user -d app -c "\d sources"
+
+echo "Migration complete!"
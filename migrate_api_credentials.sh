@@ -0,0 +1,85 @@
+#!/bin/bash
+# Run this script when containers are running to move Telegram API credentials
+# into the shared telegram_api_credentials table
+# Usage: ./migrate_api_credentials.sh
+
+echo "Creating telegram_api_credentials..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+CREATE TABLE IF NOT EXISTS telegram_api_credentials (
+    id UUID PRIMARY KEY,
+    api_id BIGINT NOT NULL UNIQUE,
+    api_hash TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+ALTER TABLE telegram_sessions ADD COLUMN IF NOT EXISTS api_credential_id UUID REFERENCES telegram_api_credentials (id);
+ALTER TABLE sources ADD COLUMN IF NOT EXISTS api_credential_id UUID REFERENCES telegram_api_credentials (id);
+COMMIT;
+"
+
+# Source api_ids are encrypted, so the backfill needs the application key
+echo "Linking sessions and sources to their credentials..."
+
+docker exec -i telegram_scraper_backend python - <<'PY'
+import uuid
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.services.encryption import decrypt_data
+
+with engine.begin() as conn:
+    credentials = dict(
+        conn.execute(text("SELECT api_id, id FROM telegram_api_credentials")).all()
+    )
+
+    def credential_for(api_id, api_hash):
+        if api_id not in credentials:
+            credentials[api_id] = uuid.uuid4()
+            # Reuse the existing ciphertext: it decrypts to the same hash
+            conn.execute(
+                text(
+                    "INSERT INTO telegram_api_credentials (id, api_id, api_hash) "
+                    "VALUES (:id, :api_id, :api_hash)"
+                ),
+                {"id": credentials[api_id], "api_id": api_id, "api_hash": api_hash},
+            )
+        return credentials[api_id]
+
+    for id_, api_id, api_hash in conn.execute(
+        text("SELECT id, api_id, api_hash FROM telegram_sessions")
+    ).all():
+        conn.execute(
+            text("UPDATE telegram_sessions SET api_credential_id = :c WHERE id = :id"),
+            {"c": credential_for(int(api_id), api_hash), "id": id_},
+        )
+
+    for id_, api_id, api_hash in conn.execute(
+        text("SELECT id, api_id, api_hash FROM sources")
+    ).all():
+        conn.execute(
+            text("UPDATE sources SET api_credential_id = :c WHERE id = :id"),
+            {"c": credential_for(int(decrypt_data(api_id)), api_hash), "id": id_},
+        )
+
+print(f"{len(credentials)} credential(s) linked")
+PY
+
+echo "Dropping per-row credential columns..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+ALTER TABLE telegram_sessions ALTER COLUMN api_credential_id SET NOT NULL;
+ALTER TABLE sources ALTER COLUMN api_credential_id SET NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_telegram_sessions_api_credential_id ON telegram_sessions (api_credential_id);
+CREATE INDEX IF NOT EXISTS ix_sources_api_credential_id ON sources (api_credential_id);
+ALTER TABLE telegram_sessions DROP COLUMN api_id, DROP COLUMN api_hash;
+ALTER TABLE sources DROP COLUMN api_id, DROP COLUMN api_hash;
+COMMIT;
+"
+
+echo "Verifying tables..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d telegram_api_credentials"
+
+echo "Migration complete!"
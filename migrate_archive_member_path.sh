@@ -0,0 +1,18 @@
+#!/bin/bash
+# Run this script when containers are running to key archive members by their path
+# Usage: ./migrate_archive_member_path.sh
+
+echo "Adding member_path column to scraped_files table..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE scraped_files ADD COLUMN IF NOT EXISTS member_path VARCHAR;"
+
+echo "Backfilling member_path of archive members..."
+docker exec telegram_scraper_db psql -U user -d app -c "UPDATE scraped_files SET member_path = extra_metadata->>'relative_path' WHERE extracted_from IS NOT NULL AND member_path IS NULL;"
+
+echo "Adding member_path to uix_source_message_file..."
+docker exec telegram_scraper_db psql -U user -d app -c "BEGIN; ALTER TABLE scraped_files DROP CONSTRAINT IF EXISTS uix_source_message_file; ALTER TABLE scraped_files ADD CONSTRAINT uix_source_message_file UNIQUE (source_id, message_id, file_id, extracted_from, member_path); COMMIT;"
+
+echo "Verifying column and constraint..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scraped_files"
+
+echo "Migration complete!"
@@ -0,0 +1,31 @@
+#!/bin/bash
+# Run this script when containers are running to widen Telegram ids/counters to BIGINT
+# and switch scrape_logs to a BIGSERIAL primary key
+# Usage: ./migrate_bigint_columns.sh
+
+echo "Widening message ids, file sizes and counters to BIGINT..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+ALTER TABLE scraped_files ALTER COLUMN message_id TYPE BIGINT;
+ALTER TABLE scraped_files ALTER COLUMN size_bytes TYPE BIGINT;
+ALTER TABLE sources ALTER COLUMN total_messages_scraped TYPE BIGINT;
+ALTER TABLE sources ALTER COLUMN total_files_downloaded TYPE BIGINT;
+COMMIT;
+"
+
+echo "Replacing scrape_logs UUID primary key with BIGSERIAL..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+ALTER TABLE scrape_logs DROP CONSTRAINT scrape_logs_pkey;
+ALTER TABLE scrape_logs DROP COLUMN id;
+ALTER TABLE scrape_logs ADD COLUMN id BIGSERIAL PRIMARY KEY;
+COMMIT;
+"
+
+echo "Verifying column types..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scraped_files"
+docker exec telegram_scraper_db psql -U user -d app -c "\d scrape_logs"
+
+echo "Migration complete!"
@@ -0,0 +1,12 @@
+#!/bin/bash
+# Run this script when containers are running to bound scraped_files.checksum to a SHA256 hex digest
+# Usage: ./migrate_checksum_length.sh
+
+echo "Bounding scraped_files.checksum to VARCHAR(64)..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE scraped_files ALTER COLUMN checksum TYPE VARCHAR(64);"
+
+echo "Verifying column type..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scraped_files"
+
+echo "Migration complete!"
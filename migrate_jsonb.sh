@@ -0,0 +1,20 @@
+#!/bin/bash
+# Run this script when containers are running to convert JSON columns to JSONB
+# Usage: ./migrate_jsonb.sh
+
+echo "Converting scraped_files.extra_metadata and sources.file_types to JSONB..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+ALTER TABLE scraped_files ALTER COLUMN extra_metadata TYPE jsonb USING extra_metadata::jsonb;
+ALTER TABLE sources ALTER COLUMN file_types TYPE jsonb USING file_types::jsonb;
+COMMIT;
+"
+
+echo "Creating GIN index on scraped_files.extra_metadata..."
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_scraped_files_meta ON scraped_files USING GIN (extra_metadata jsonb_path_ops);"
+
+echo "Verifying column types..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scraped_files"
+
+echo "Migration complete!"
@@ -0,0 +1,40 @@
+#!/bin/bash
+# Run this script when containers are running to hash-partition scrape_logs by run_id
+# Usage: ./migrate_partition_scrape_logs.sh
+
+echo "Rebuilding scrape_logs as a table hash-partitioned by run_id..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+ALTER TABLE scrape_logs RENAME TO scrape_logs_old;
+ALTER INDEX ix_scrape_logs_run_time RENAME TO ix_scrape_logs_old_run_time;
+ALTER TABLE scrape_logs_old RENAME CONSTRAINT scrape_logs_pkey TO scrape_logs_old_pkey;
+CREATE TABLE scrape_logs (
+    id BIGSERIAL NOT NULL,
+    run_id UUID NOT NULL REFERENCES scrape_runs (id),
+    timestamp TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    level loglevel,
+    message VARCHAR NOT NULL,
+    details JSON,
+    PRIMARY KEY (id, run_id)
+) PARTITION BY HASH (run_id);
+CREATE TABLE scrape_logs_p0 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 0);
+CREATE TABLE scrape_logs_p1 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 1);
+CREATE TABLE scrape_logs_p2 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 2);
+CREATE TABLE scrape_logs_p3 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 3);
+CREATE TABLE scrape_logs_p4 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 4);
+CREATE TABLE scrape_logs_p5 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 5);
+CREATE TABLE scrape_logs_p6 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 6);
+CREATE TABLE scrape_logs_p7 PARTITION OF scrape_logs FOR VALUES WITH (MODULUS 8, REMAINDER 7);
+CREATE INDEX ix_scrape_logs_run_time ON scrape_logs (run_id, timestamp);
+INSERT INTO scrape_logs (id, run_id, timestamp, level, message, details)
+    SELECT id, run_id, timestamp, level, message, details FROM scrape_logs_old;
+SELECT setval(pg_get_serial_sequence('scrape_logs', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM scrape_logs;
+DROP TABLE scrape_logs_old;
+COMMIT;
+"
+
+echo "Verifying partitions..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d+ scrape_logs"
+
+echo "Migration complete!"
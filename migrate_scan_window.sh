@@ -0,0 +1,12 @@
+#!/bin/bash
+# Run this script when containers are running to record the newest scanned message id per run
+# Usage: ./migrate_scan_window.sh
+
+echo "Adding last_scanned_message_id column to scrape_runs..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE scrape_runs ADD COLUMN IF NOT EXISTS last_scanned_message_id BIGINT;"
+
+echo "Verifying column was added..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scrape_runs"
+
+echo "Migration complete!"
@@ -0,0 +1,18 @@
+#!/bin/bash
+# Run this script when containers are running to add the per-run and archive checksum indexes
+# Usage: ./migrate_scrape_indexes.sh
+
+echo "Creating indexes on scraped_files and scrape_logs..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraped_files_run_processed ON scraped_files (run_id, processed_at);"
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraped_files_source_archive_ck ON scraped_files (source_id, archive_checksum) WHERE archive_checksum IS NOT NULL;"
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scrape_logs_run_time ON scrape_logs (run_id, timestamp);"
+
+echo "Dropping superseded archive_checksum index..."
+docker exec telegram_scraper_db psql -U user -d app -c "DROP INDEX CONCURRENTLY IF EXISTS ix_scraped_files_archive_checksum;"
+
+echo "Verifying indexes..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scraped_files"
+docker exec telegram_scraper_db psql -U user -d app -c "\d scrape_logs"
+
+echo "Migration complete!"
@@ -0,0 +1,12 @@
+#!/bin/bash
+# Run this script when containers are running to add the (source_id, started_at DESC) index on scrape_runs
+# Usage: ./migrate_scrape_run_index.sh
+
+echo "Creating ix_scraperun_source_started index on scrape_runs..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scraperun_source_started ON scrape_runs (source_id, started_at DESC);"
+
+echo "Verifying index was added..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scrape_runs"
+
+echo "Migration complete!"
@@ -0,0 +1,14 @@
+#!/bin/bash
+# Run this script when containers are running to let Postgres fill run, file and log timestamps
+# Usage: ./migrate_server_timestamps.sh
+
+echo "Setting now() defaults on timestamp columns..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE scrape_runs ALTER COLUMN started_at SET DEFAULT now();"
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE scraped_files ALTER COLUMN processed_at SET DEFAULT now();"
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE scrape_logs ALTER COLUMN timestamp SET DEFAULT now();"
+
+echo "Verifying defaults..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d scrape_logs"
+
+echo "Migration complete!"
@@ -0,0 +1,21 @@
+#!/bin/bash
+# Run this script when containers are running to convert session ids to native UUID columns
+# Usage: ./migrate_session_uuid.sh
+
+echo "Converting telegram_sessions, temp_sessions and sources.session_ref to UUID..."
+
+docker exec telegram_scraper_db psql -U user -d app -v ON_ERROR_STOP=1 -c "
+BEGIN;
+ALTER TABLE sources DROP CONSTRAINT IF EXISTS sources_session_ref_fkey;
+ALTER TABLE telegram_sessions ALTER COLUMN id TYPE UUID USING id::uuid;
+ALTER TABLE temp_sessions ALTER COLUMN id TYPE UUID USING id::uuid;
+ALTER TABLE sources ALTER COLUMN session_ref TYPE UUID USING session_ref::uuid;
+ALTER TABLE sources ADD CONSTRAINT sources_session_ref_fkey FOREIGN KEY (session_ref) REFERENCES telegram_sessions (id);
+COMMIT;
+"
+
+echo "Verifying column types..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d telegram_sessions"
+docker exec telegram_scraper_db psql -U user -d app -c "\d temp_sessions"
+
+echo "Migration complete!"
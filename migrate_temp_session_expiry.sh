@@ -0,0 +1,15 @@
+#!/bin/bash
+# Run this script when containers are running to add temp_sessions expiry/phone indexes
+# and the SQL-side default for expires_at
+# Usage: ./migrate_temp_session_expiry.sh
+
+echo "Updating temp_sessions..."
+
+docker exec telegram_scraper_db psql -U user -d app -c "ALTER TABLE temp_sessions ALTER COLUMN expires_at SET DEFAULT now() + interval '10 minutes';"
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX IF NOT EXISTS ix_temp_sessions_expires ON temp_sessions (expires_at);"
+docker exec telegram_scraper_db psql -U user -d app -c "CREATE INDEX IF NOT EXISTS ix_temp_sessions_phone ON temp_sessions (phone_number);"
+
+echo "Verifying table..."
+docker exec telegram_scraper_db psql -U user -d app -c "\d temp_sessions"
+
+echo "Migration complete!"
@@ -23,4 +23,4 @@ echo "✓ Prefect verification complete"
 
 # Start the FastAPI application
 echo "Starting FastAPI application..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --reload